@@ -0,0 +1,10 @@
+import pytest
+
+from yatube.test_runner import isolated_cache
+
+
+@pytest.fixture(autouse=True, scope='session')
+def test_cache():
+    """Run pytest suites with a cache of their own, as manage.py test."""
+    with isolated_cache() as directory:
+        yield directory
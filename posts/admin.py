@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.db.models.expressions import RawSQL
 
-from .models import Post, Group
+from .models import Comment, Follow, Job, Post, Group
+from .search import fts_available, fts_query, search_filter_sql
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -9,6 +11,15 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ("pub_date",)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Search posts through full-text index instead of LIKE scan."""
+        if not fts_query(search_term) or not fts_available():
+            return super().get_search_results(
+                request, queryset, search_term)
+        queryset = queryset.filter(
+            pk__in=RawSQL(*search_filter_sql(search_term)))
+        return queryset, False
+
 admin.site.register(Post, PostAdmin)
 
 
@@ -19,3 +30,28 @@ class GroupAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 admin.site.register(Group, GroupAdmin)
+
+
+class FollowAdmin(admin.ModelAdmin):
+    list_display = ("pk", "user", "author")
+    search_fields = ("user__username", "author__username")
+    raw_id_fields = ("user", "author")
+
+admin.site.register(Follow, FollowAdmin)
+
+
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ("pk", "text", "created", "author", "post")
+    search_fields = ("text", "author__username")
+    list_filter = ("created",)
+    raw_id_fields = ("post", "author")
+
+admin.site.register(Comment, CommentAdmin)
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("pk", "name", "key", "status", "attempts", "run_at")
+    search_fields = ("name", "key")
+    list_filter = ("status", "name")
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,147 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET
+
+from .models import Group, Post, User
+from .pagination import (POSTS_PER_PAGE, decode_cursor, keyset_queryset,
+                         make_cursor)
+
+
+# Public field name and lookup it is read from.
+API_FIELDS = {
+    'id': 'pk',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'edited': 'edited',
+    'author': 'author__username',
+    'group': 'group__slug',
+}
+MAX_LIMIT = 100
+CHUNK_SIZE = 500
+
+
+class ApiError(Exception):
+    pass
+
+
+def selected_fields(request):
+    """Return field names listed in ?fields=, all of them by default."""
+    names = request.GET.get('fields')
+    if not names:
+        return list(API_FIELDS)
+    names = [name.strip() for name in names.split(',') if name.strip()]
+    unknown = [name for name in names if name not in API_FIELDS]
+    if unknown:
+        raise ApiError(f'Unknown fields: {", ".join(unknown)}.')
+    return names
+
+
+def selected_limit(request):
+    try:
+        limit = int(request.GET.get('limit', POSTS_PER_PAGE))
+    except ValueError:
+        raise ApiError('Limit must be a number.')
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def request_cursor(request, name):
+    value = request.GET.get(name)
+    if value is None:
+        return None
+    cursor = decode_cursor(value)
+    if cursor is None:
+        raise ApiError(f'Malformed {name} cursor.')
+    return cursor
+
+
+def dumps(value):
+    return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def stream_results(rows, fields, limit, cursor_field, next_cursor=None):
+    """Yield JSON document with rows one by one.
+
+    Next cursor is known only after rows are read, so it goes last:
+    {"results": [...], "next": "<cursor>"}. Sync answers (cursor by
+    edit time) always point at their last row, feed pages only when
+    there are more rows after it.
+    """
+    yield '{"results": ['
+    last = None
+    more = False
+    for number, row in enumerate(rows):
+        if number == limit:
+            more = True
+            break
+        if number:
+            yield ','
+        yield dumps({name: row[API_FIELDS[name]] for name in fields})
+        last = row
+    if last is not None and (more or cursor_field == 'edited'):
+        next_cursor = make_cursor(last[cursor_field], last['pk'])
+    yield '], "next": ' + dumps(next_cursor) + '}'
+
+
+def feed_response(request, queryset):
+    """Stream posts of feed as JSON.
+
+    ?before=<cursor> continues the feed from newest to oldest post,
+    ?since=<cursor> returns posts created or edited after the cursor
+    oldest change first; "next" of the answer is the cursor to pass
+    on the following request.
+    """
+    try:
+        fields = selected_fields(request)
+        limit = selected_limit(request)
+        since = request_cursor(request, 'since')
+        before = request_cursor(request, 'before')
+    except ApiError as error:
+        return JsonResponse({'detail': str(error)}, status=400)
+    if since is not None:
+        cursor_field = 'edited'
+        queryset = keyset_queryset(queryset, after=since, field='edited')
+        next_cursor = request.GET['since']
+    else:
+        cursor_field = 'pub_date'
+        queryset = keyset_queryset(queryset, before=before)
+        next_cursor = None
+    lookups = {API_FIELDS[name] for name in fields} | {'pk', cursor_field}
+    rows = queryset.values(*lookups)[:limit + 1].iterator(CHUNK_SIZE)
+    return StreamingHttpResponse(
+        stream_results(rows, fields, limit, cursor_field, next_cursor),
+        content_type='application/json',
+    )
+
+
+@require_GET
+def feed(request):
+    return feed_response(request, Post.objects.all())
+
+
+@require_GET
+def group_feed(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return feed_response(request, group.posts.all())
+
+
+@require_GET
+def author_feed(request, username):
+    author = get_object_or_404(User, username=username)
+    return feed_response(request, author.posts.all())
+
+
+@require_GET
+def post_detail(request, post_id):
+    try:
+        fields = selected_fields(request)
+    except ApiError as error:
+        return JsonResponse({'detail': str(error)}, status=400)
+    lookups = [API_FIELDS[name] for name in fields]
+    row = get_object_or_404(Post.objects.values(*lookups), pk=post_id)
+    return JsonResponse(
+        {name: row[API_FIELDS[name]] for name in fields},
+        json_dumps_params={'ensure_ascii': False},
+    )
@@ -1,5 +1,20 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from . import signals, tasks  # noqa: F401
+        post_migrate.connect(restore_search_triggers, sender=self)
+        from .slow_queries import install
+        connection_created.connect(install)
+
+
+def restore_search_triggers(using, **kwargs):
+    from django.db import connections
+
+    from .search import ensure_search_triggers
+    ensure_search_triggers(connections[using])
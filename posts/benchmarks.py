@@ -0,0 +1,419 @@
+import contextlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.db.backends.sqlite3.base import FORMAT_QMARK_REGEX
+from django.template import RequestContext
+from django.template.backends.django import DjangoTemplates
+from django.test import Client, RequestFactory
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from about import urls as about_urls
+from yatube.sqlite3.base import DEFAULT_PRAGMAS, apply_pragmas
+
+from . import urls as posts_urls
+from .models import Post, User
+from .counters import author_posts_count, total_posts_count
+from .pagination import POSTS_PER_PAGE, make_cursor, paginate
+from .seeding import SEED_GROUP, SEED_USER, seed
+from .slow_queries import percentile
+from .template_loaders import precompile_templates
+
+
+# URL name and function building its path from the seeded dataset.
+URL_CASES = {
+    'index': lambda data: reverse('index'),
+    'index_deep_page': lambda data: (
+        reverse('index') + f'?page={data["deep_page"]}'),
+    'index_keyset': lambda data: (
+        reverse('index') + f'?before={data["deep_cursor"]}'),
+    'group': lambda data: reverse('group', args=[data['group']]),
+    'profile': lambda data: reverse('profile', args=[data['author']]),
+    'post': lambda data: reverse(
+        'post', args=[data['author'], data['post_id']]),
+    'post_edit': lambda data: reverse(
+        'post_edit', args=[data['author'], data['post_id']]),
+    'new': lambda data: reverse('new'),
+    'follow_index': lambda data: reverse('follow_index'),
+    'search': lambda data: reverse('search') + '?q=lorem',
+    'api_feed': lambda data: reverse('api_feed'),
+    'api_post': lambda data: reverse('api_post', args=[data['post_id']]),
+    'api_group_feed': lambda data: reverse(
+        'api_group_feed', args=[data['group']]),
+    'api_author_feed': lambda data: reverse(
+        'api_author_feed', args=[data['author']]),
+    'feed_rss': lambda data: reverse('feed_rss'),
+    'feed_atom': lambda data: reverse('feed_atom'),
+    'group_feed_rss': lambda data: reverse(
+        'group_feed_rss', args=[data['group']]),
+    'group_feed_atom': lambda data: reverse(
+        'group_feed_atom', args=[data['group']]),
+    'author_feed_rss': lambda data: reverse(
+        'author_feed_rss', args=[data['author']]),
+    'author_feed_atom': lambda data: reverse(
+        'author_feed_atom', args=[data['author']]),
+    'slow_queries': lambda data: reverse('slow_queries'),
+    'about:author': lambda data: reverse('about:author'),
+    'about:tech': lambda data: reverse('about:tech'),
+}
+# URL names deliberately left out and the reason why.
+SKIPPED_URLS = {
+    'export_posts': 'streams the whole table',
+    'profile_follow': 'changes data, POST only',
+    'profile_unfollow': 'changes data, POST only',
+    'add_comment': 'changes data, POST only',
+}
+CLIENTS = ('anonymous', 'author')
+SOURCE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+# Template loader setups compared by template benchmark.
+TEMPLATE_PROFILES = {
+    'uncached': SOURCE_LOADERS,
+    'cached': [('django.template.loaders.cached.Loader', SOURCE_LOADERS)],
+}
+
+
+@contextlib.contextmanager
+def benchmark_database():
+    """Run benchmark against throwaway test database."""
+    runner = DiscoverRunner(verbosity=0, interactive=False)
+    runner.setup_test_environment()
+    old_config = runner.setup_databases()
+    try:
+        yield
+    finally:
+        runner.teardown_databases(old_config)
+        runner.teardown_test_environment()
+
+
+def url_names():
+    """Return names of all URLs of posts.urls and about.urls."""
+    names = [pattern.name for pattern in posts_urls.urlpatterns]
+    names += [f'{about_urls.app_name}:{pattern.name}'
+              for pattern in about_urls.urlpatterns]
+    return names
+
+
+def missing_cases():
+    """Return URL names that have neither benchmark case nor skip reason."""
+    return [name for name in url_names()
+            if name not in URL_CASES and name not in SKIPPED_URLS]
+
+
+def dataset_size(posts):
+    """Return numbers of users and groups for dataset of posts."""
+    return {
+        'users': max(10, posts // 100),
+        'groups': max(5, posts // 10000),
+        'posts': posts,
+    }
+
+
+def dataset_targets():
+    """Return author, group, post and deep page of seeded dataset."""
+    author = User.objects.get(username=SEED_USER.format(0))
+    post = author.posts.latest('pub_date')
+    total = Post.objects.count()
+    middle = Post.objects.order_by('-pub_date', '-pk')[total // 2]
+    return {
+        'user': author,
+        'author': author.username,
+        'group': SEED_GROUP.format(0),
+        'post_id': post.pk,
+        'deep_page': max(total // 10 // 2, 1),
+        'deep_cursor': make_cursor(middle.pub_date, middle.pk),
+    }
+
+
+def measure(client, path, requests):
+    timings = []
+    queries = []
+    size = 0
+    status = None
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get(path)
+            if response.streaming:
+                size = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                size = len(response.content)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured))
+        status = response.status_code
+    return {
+        'status': status,
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'queries': round(sum(queries) / len(queries), 2),
+        'bytes': size,
+    }
+
+
+def run_benchmarks(sizes, requests, report=None):
+    """Grow seed dataset through sizes and measure every URL at each.
+
+    Return results as {size: {url name: {client: metrics}}}.
+    """
+    results = {}
+    for posts in sorted(sizes):
+        seed(**dataset_size(posts))
+        cache.clear()
+        data = dataset_targets()
+        clients = {'anonymous': Client(), 'author': Client()}
+        clients['author'].force_login(data['user'])
+        size_results = results[str(posts)] = {}
+        for name, build_path in URL_CASES.items():
+            path = build_path(data)
+            size_results[name] = {
+                client_name: measure(clients[client_name], path, requests)
+                for client_name in CLIENTS
+            }
+            if report is not None:
+                report(posts, name, size_results[name])
+    return results
+
+
+def compare_results(previous, current, threshold=0.2):
+    """Return regressions of p95 latency, queries and bytes above
+    threshold share between two benchmark results.
+    """
+    regressions = []
+    for size, urls in current.items():
+        for name, clients in urls.items():
+            for client_name, metrics in clients.items():
+                old = previous.get(size, {}).get(name, {}).get(client_name)
+                if old is None:
+                    continue
+                for metric in ('p95_ms', 'queries', 'bytes'):
+                    if metrics[metric] > old[metric] * (1 + threshold):
+                        regressions.append({
+                            'size': size,
+                            'url': name,
+                            'client': client_name,
+                            'metric': metric,
+                            'previous': old[metric],
+                            'current': metrics[metric],
+                        })
+    return regressions
+
+
+def template_engine(loaders):
+    """Return engine of project template settings with given loaders."""
+    options = settings.TEMPLATES[0]['OPTIONS']
+    return DjangoTemplates({
+        'NAME': 'benchmark',
+        'DIRS': [settings.TEMPLATES_DIR],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'context_processors': options['context_processors'],
+            'loaders': loaders,
+        },
+    }).engine
+
+
+def template_contexts(data):
+    """Return template name, request and context of index and profile."""
+    request = RequestFactory().get(reverse('index'))
+    request.user = AnonymousUser()
+    author = data['user']
+    contexts = [
+        ('index.html', paginate(
+            request, Post.objects.with_related(),
+            count=total_posts_count())),
+        ('profile.html', dict(
+            paginate(request, author.posts.with_related(),
+                     count=author_posts_count(author)),
+            author=author,
+            posts_count=author_posts_count(author),
+        )),
+    ]
+    for _, context in contexts:
+        list(context['page'])
+    return request, contexts
+
+
+def run_template_benchmarks(posts, requests):
+    """Measure per-request render time of index.html and profile.html
+    with every loader setup of TEMPLATE_PROFILES.
+
+    Return results as {template: {profile: metrics}}.
+    """
+    seed(**dataset_size(posts))
+    request, contexts = template_contexts(dataset_targets())
+    results = {}
+    for profile, loaders in TEMPLATE_PROFILES.items():
+        engine = template_engine(loaders)
+        precompile_templates(engine)
+        for name, context in contexts:
+            timings = []
+            for _ in range(requests):
+                started = time.perf_counter()
+                engine.get_template(name).render(
+                    RequestContext(request, context))
+                timings.append((time.perf_counter() - started) * 1000)
+            results.setdefault(name, {})[profile] = {
+                'p50_ms': round(percentile(timings, 0.50), 3),
+                'p95_ms': round(percentile(timings, 0.95), 3),
+            }
+    return results
+
+
+# Connection setups compared by concurrency benchmark: stock Django one
+# and yatube.sqlite3 with persistent connections.
+DATABASE_PROFILES = {
+    'default': {
+        'pragmas': {'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+        'persistent': False,
+        'begin': 'BEGIN',
+    },
+    'tuned': {
+        'pragmas': DEFAULT_PRAGMAS,
+        'persistent': True,
+        'begin': 'BEGIN IMMEDIATE',
+    },
+}
+
+
+def database_snapshot(directory):
+    """Copy current database into file in directory, return its path."""
+    path = os.path.join(directory, 'snapshot.sqlite3')
+    connection.ensure_connection()
+    target = sqlite3.connect(path)
+    try:
+        connection.connection.backup(target)
+    finally:
+        target.close()
+    return path
+
+
+def read_statements(author):
+    """Return SQL of index and profile first pages as views run it."""
+    statements = []
+    for queryset in (Post.objects.with_related(),
+                     author.posts.with_related()):
+        sql, params = queryset[:POSTS_PER_PAGE].query.sql_with_params()
+        statements.append(
+            (FORMAT_QMARK_REGEX.sub('?', sql).replace('%%', '%'), params))
+    return statements
+
+
+def run_database_profile(path, profile, statements, author_id, readers,
+                         writers, seconds):
+    local = threading.local()
+    deadline = time.monotonic() + seconds
+    lock = threading.Lock()
+    stats = {'reads': [], 'writes': [], 'errors': 0}
+
+    def connect():
+        if profile['persistent'] and getattr(local, 'connection', None):
+            return local.connection
+        db = sqlite3.connect(path, isolation_level=None)
+        apply_pragmas(db, profile['pragmas'])
+        if profile['persistent']:
+            local.connection = db
+        return db
+
+    def release(db):
+        if not profile['persistent']:
+            db.close()
+
+    def read(db, number):
+        sql, params = statements[number % len(statements)]
+        db.execute(sql, params).fetchall()
+
+    def write(db, number):
+        db.execute(profile['begin'])
+        try:
+            db.execute(
+                'SELECT posts_count FROM posts_authorstats '
+                'WHERE author_id = ?', [author_id]).fetchall()
+            now = timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+            db.execute(
+                'INSERT INTO posts_post (text, pub_date, edited, '
+                'author_id, comments_count, image, thumbnails) '
+                "VALUES (?, ?, ?, ?, 0, '', '')",
+                [f'Benchmark post {number}', now, now, author_id])
+            db.execute(
+                'UPDATE posts_authorstats SET posts_count = posts_count + 1 '
+                'WHERE author_id = ?', [author_id])
+            db.execute('COMMIT')
+        except sqlite3.Error:
+            db.execute('ROLLBACK')
+            raise
+
+    def worker(operation, kind):
+        number = 0
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                db = connect()
+                try:
+                    operation(db, number)
+                finally:
+                    release(db)
+            except sqlite3.OperationalError:
+                with lock:
+                    stats['errors'] += 1
+                continue
+            finally:
+                number += 1
+            with lock:
+                stats[kind].append((time.perf_counter() - started) * 1000)
+        if getattr(local, 'connection', None):
+            local.connection.close()
+
+    threads = [threading.Thread(target=worker, args=(read, 'reads'))
+               for _ in range(readers)]
+    threads += [threading.Thread(target=worker, args=(write, 'writes'))
+                for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result = {'errors': stats['errors']}
+    for kind in ('reads', 'writes'):
+        timings = stats[kind] or [0]
+        result[kind] = {
+            'per_second': round(len(stats[kind]) / seconds, 1),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+        }
+    return result
+
+
+def run_database_benchmarks(posts, readers, writers, seconds):
+    """Run concurrent readers and writers against file copy of seeded
+    database with every connection setup of DATABASE_PROFILES.
+
+    Return results as {profile: {"reads"/"writes": metrics, "errors"}}.
+    """
+    seed(**dataset_size(posts))
+    author = dataset_targets()['user']
+    statements = read_statements(author)
+    directory = tempfile.mkdtemp()
+    try:
+        snapshot = database_snapshot(directory)
+        results = {}
+        for name, profile in DATABASE_PROFILES.items():
+            path = os.path.join(directory, f'{name}.sqlite3')
+            shutil.copy(snapshot, path)
+            results[name] = run_database_profile(
+                path, profile, statements, author.pk, readers, writers,
+                seconds)
+    finally:
+        shutil.rmtree(directory)
+    return results
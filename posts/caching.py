@@ -0,0 +1,203 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import HttpResponse
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from . import replicas
+from .models import Post
+from .pagination import EPOCH
+
+
+CARD_TIMEOUT = 60 * 60 * 24
+CARD_KEY = 'post_card:{}:{}:{:d}:{}:{}'
+CARD_VERSION_KEY = 'post_card_version:{}'
+
+PAGE_KEY = 'page:{}'
+PAGE_LOCK_KEY = 'page_lock:{}'
+PAGE_GENERATION_KEY = 'page_generation:{}'
+LAST_MODIFIED_KEY = 'last_modified:{}'
+# Stale page stays in cache this long to be served while it regenerates.
+PAGE_STALE_TIMEOUT = 60 * 60
+PAGE_LOCK_TIMEOUT = 30
+
+
+def seed():
+    """Return first value of counter, larger than any counted before.
+
+    Counter evicted from cache starts again from current time in
+    microseconds, so it never comes back to a value cached entries
+    were stored under.
+    """
+    return int(time.time() * 10 ** 6)
+
+
+def counter(key):
+    """Return value of counter stored in cache, starting it if absent."""
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, seed(), None)
+        value = cache.get(key)
+    return value
+
+
+def bump(key):
+    """Increment counter stored in cache, starting it if it is absent."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, seed(), None)
+
+
+def read_source():
+    """Return token of database copy the current request reads from.
+
+    Cards, pages and ETags of replica reads carry the sync number of
+    the copy, so a copy lagging behind writes is never cached or
+    tagged as the current version.
+    """
+    return replicas.read_source()
+
+
+def card_versions(post_ids):
+    """Return {post_id: version} of cards read from cache at once."""
+    keys = {CARD_VERSION_KEY.format(pk): pk for pk in post_ids}
+    found = cache.get_many(list(keys))
+    return {
+        pk: found[key] if key in found else counter(key)
+        for key, pk in keys.items()
+    }
+
+
+def card_version(post_id):
+    """Return current version of rendered card for post."""
+    return counter(CARD_VERSION_KEY.format(post_id))
+
+
+def bump_card_version(post_id):
+    """Make cached cards of post stale, next render stores new version."""
+    bump(CARD_VERSION_KEY.format(post_id))
+
+
+def card_key(post_id, editable, layout='card', version=None, source=None):
+    """Return cache key of post card in its current version."""
+    if version is None:
+        version = card_version(post_id)
+    if source is None:
+        source = read_source()
+    return CARD_KEY.format(post_id, version, editable, layout, source)
+
+
+def page_generation(scope):
+    return counter(PAGE_GENERATION_KEY.format(scope))
+
+
+def bump_page_generation(*scopes):
+    """Make cached pages of scopes stale, e.g. 'index', 'group:<slug>'.
+
+    Scopes are also stamped as modified now for conditional GET.
+    """
+    now = timezone.now()
+    for scope in scopes:
+        bump(PAGE_GENERATION_KEY.format(scope))
+        cache.set(LAST_MODIFIED_KEY.format(scope), now, None)
+
+
+def scope_posts(scope):
+    """Return queryset of posts shown on pages of scope."""
+    kind, _, value = scope.partition(':')
+    if kind == 'group':
+        return Post.objects.filter(group__slug=value)
+    if kind == 'profile':
+        return Post.objects.filter(author__username=value)
+    return Post.objects.all()
+
+
+def scope_last_modified(scope):
+    """Return time of the last change of posts in scope.
+
+    Stamp set by bump_page_generation also covers deleted posts; when it
+    is not in cache the newest edit time is read from the database.
+    """
+    key = LAST_MODIFIED_KEY.format(scope)
+    last_modified = cache.get(key)
+    if last_modified is None:
+        last_modified = scope_posts(scope).aggregate(
+            last=Max('edited'))['last'] or EPOCH
+        cache.add(key, last_modified, None)
+    return last_modified
+
+
+def conditional_page(scope):
+    """Answer 304 Not Modified to GET of unchanged page of scope.
+
+    ETag covers the scope change time, the full path with page number
+    or cursor, the user the page was rendered for and the replica copy
+    it was read from. Last-Modified is sent to anonymous visitors only,
+    as it cannot tell users apart, and not for replica reads, whose
+    copy may be synced after the change time.
+    """
+    def etag(request, *args, **kwargs):
+        last_modified = scope_last_modified(scope.format(**kwargs))
+        raw = '{}:{}:{}:{}'.format(
+            last_modified.timestamp(),
+            request.user.pk,
+            request.get_full_path(),
+            read_source(),
+        )
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        if not request.user.is_authenticated and not read_source():
+            return scope_last_modified(scope.format(**kwargs))
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+def cache_anonymous_page(scope):
+    """Cache anonymous GET responses of view under generation of scope.
+
+    Scope is formatted with view kwargs, e.g. 'group:{slug}'. When the
+    page is expired or its scope generation was bumped, one request
+    takes the lock and renders it again while others get stale copy.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            path = request.get_full_path().encode()
+            # Pages read from replica are kept apart per synced copy.
+            digest = hashlib.md5(path).hexdigest() + read_source()
+            key = PAGE_KEY.format(digest)
+            generation = page_generation(scope.format(**kwargs))
+            entry = cache.get(key)
+            if entry is not None:
+                fresh = (entry['generation'] == generation
+                         and entry['expires'] > time.time())
+                lock_key = PAGE_LOCK_KEY.format(digest)
+                if fresh or not cache.add(lock_key, 1, PAGE_LOCK_TIMEOUT):
+                    return HttpResponse(
+                        entry['content'],
+                        content_type=entry['content_type'],
+                    )
+            try:
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200:
+                    cache.set(key, {
+                        'generation': generation,
+                        'expires': time.time() + settings.PAGE_CACHE_TIMEOUT,
+                        'content': response.content,
+                        'content_type': response['Content-Type'],
+                    }, PAGE_STALE_TIMEOUT)
+            finally:
+                if entry is not None:
+                    cache.delete(lock_key)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,189 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+
+TOTAL_POSTS_KEY = "posts_count:total"
+
+
+def total_posts_count():
+    """Return number of all posts from cache, counting them once per TTL.
+
+    With POSTS_COUNT_ESTIMATE the number is taken from the largest id,
+    which is one index lookup instead of a scan of the whole table.
+    """
+    count = cache.get(TOTAL_POSTS_KEY)
+    if count is None:
+        if settings.POSTS_COUNT_ESTIMATE:
+            count = Post.objects.aggregate(n=Max("pk"))["n"] or 0
+        else:
+            count = Post.objects.count()
+        cache.set(TOTAL_POSTS_KEY, count, settings.POSTS_COUNT_TIMEOUT)
+    return count
+
+
+def change_total_posts(delta):
+    try:
+        cache.incr(TOTAL_POSTS_KEY, delta)
+    except ValueError:
+        pass
+
+
+def stats_defaults(author_id):
+    """Counters of author without stats row, computed only if needed."""
+    return {
+        "posts_count": Post.objects.filter(author_id=author_id).count,
+        "followers_count": Follow.objects.filter(author_id=author_id).count,
+        "following_count": Follow.objects.filter(user_id=author_id).count,
+    }
+
+
+def author_stats(author):
+    """Return AuthorStats of author, seeding counters on first read."""
+    stats, _ = AuthorStats.objects.get_or_create(
+        author=author,
+        defaults=stats_defaults(author.pk),
+    )
+    return stats
+
+
+def author_posts_count(author):
+    """Return number of author posts, seeding counter on first read."""
+    return author_stats(author).posts_count
+
+
+def group_posts_count(group):
+    """Return number of group posts, seeding counter on first read."""
+    if group.posts_count is None:
+        group.posts_count = group.posts.count()
+        Group.objects.filter(pk=group.pk).update(
+            posts_count=group.posts_count)
+    return group.posts_count
+
+
+def add_author_post(author_id):
+    updated = AuthorStats.objects.filter(author_id=author_id).update(
+        posts_count=F("posts_count") + 1)
+    if not updated:
+        AuthorStats.objects.get_or_create(
+            author_id=author_id,
+            defaults=stats_defaults(author_id),
+        )
+
+
+def remove_author_post(author_id):
+    # No seeding here: the author may be in the middle of cascade delete.
+    AuthorStats.objects.filter(
+        author_id=author_id, posts_count__gt=0,
+    ).update(posts_count=F("posts_count") - 1)
+
+
+def add_group_post(group_id):
+    updated = Group.objects.filter(
+        pk=group_id, posts_count__isnull=False,
+    ).update(posts_count=F("posts_count") + 1)
+    if not updated:
+        Group.objects.filter(pk=group_id).update(
+            posts_count=Post.objects.filter(group_id=group_id).count())
+
+
+def remove_group_post(group_id):
+    Group.objects.filter(
+        pk=group_id, posts_count__gt=0,
+    ).update(posts_count=F("posts_count") - 1)
+
+
+def change_comments_count(post_id, delta):
+    queryset = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        queryset = queryset.filter(comments_count__gt=0)
+    queryset.update(comments_count=F("comments_count") + delta)
+
+
+def change_follow_counts(user_id, author_id, delta):
+    """Add delta to following of user and followers of author.
+
+    Missing stats rows are seeded from follows table, which already
+    has the change.
+    """
+    for pk, field in ((user_id, "following_count"),
+                      (author_id, "followers_count")):
+        queryset = AuthorStats.objects.filter(author_id=pk)
+        if delta < 0:
+            queryset = queryset.filter(**{f"{field}__gt": 0})
+        updated = queryset.update(**{field: F(field) + delta})
+        if not updated and delta > 0:
+            AuthorStats.objects.get_or_create(
+                author_id=pk, defaults=stats_defaults(pk))
+
+
+def create_missing_stats(user_ids):
+    """Create stats rows with all counters for users given by queryset."""
+    rows = User.objects.filter(pk__in=user_ids).annotate(
+        posts_n=Count("posts", distinct=True),
+        followers_n=Count("following", distinct=True),
+        following_n=Count("follower", distinct=True),
+    ).values_list("pk", "posts_n", "followers_n", "following_n")
+    return AuthorStats.objects.bulk_create(
+        (AuthorStats(
+            author_id=pk,
+            posts_count=posts,
+            followers_count=followers,
+            following_count=following,
+        ) for pk, posts, followers, following in rows.iterator()),
+        batch_size=1000,
+    )
+
+
+def recount_follows():
+    """Recompute follower and following counters from follows table.
+
+    Return number of stats rows written.
+    """
+    def follow_counts(field):
+        return Follow.objects.filter(
+            **{field: OuterRef("author")},
+        ).order_by().values(field).annotate(n=Count("pk")).values("n")
+
+    updated = AuthorStats.objects.update(
+        followers_count=Coalesce(Subquery(follow_counts("author")), 0),
+        following_count=Coalesce(Subquery(follow_counts("user")), 0),
+    )
+    missing = User.objects.filter(stats__isnull=True).filter(
+        Q(follower__isnull=False) | Q(following__isnull=False),
+    ).distinct().values_list("pk", flat=True)
+    return updated + len(create_missing_stats(missing))
+
+
+def recount_posts():
+    """Recompute all post counters from posts table in bulk.
+
+    Follow counters of authors are left as they are, see
+    recount_follows. Return number of author and group counters written.
+    """
+    author_counts = Post.objects.filter(
+        author=OuterRef("author"),
+    ).order_by().values("author").annotate(n=Count("pk")).values("n")
+    authors = AuthorStats.objects.update(
+        posts_count=Coalesce(Subquery(author_counts), 0))
+    missing = User.objects.filter(stats__isnull=True).annotate(
+        n=Count("posts")).filter(n__gt=0).values_list("pk", flat=True)
+    created = create_missing_stats(missing)
+    group_counts = Post.objects.filter(
+        group=OuterRef("pk"),
+    ).order_by().values("group").annotate(n=Count("pk")).values("n")
+    groups = Group.objects.update(
+        posts_count=Coalesce(Subquery(group_counts), 0))
+    return authors + len(created), groups
+
+
+def recount_comments():
+    """Recompute comment counters of posts, return number of posts."""
+    comment_counts = Comment.objects.filter(
+        post=OuterRef("pk"),
+    ).order_by().values("post").annotate(n=Count("pk")).values("n")
+    return Post.objects.update(
+        comments_count=Coalesce(Subquery(comment_counts), 0))
@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Post
+
+
+EXPORT_FIELDS = ('id', 'text', 'pub_date', 'edited', 'author', 'group',
+                 'group_title')
+EXPORT_LOOKUPS = ('pk', 'text', 'pub_date', 'edited', 'author__username',
+                  'group__slug', 'group__title')
+EXPORT_CHUNK_SIZE = 2000
+
+
+def export_rows(chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield posts joined with author and group as tuples of values.
+
+    Table is read in chunks by id range, each chunk is one short query,
+    so memory and query cost stay flat however big the table is.
+    """
+    last_pk = 0
+    while True:
+        chunk = list(
+            Post.objects.filter(pk__gt=last_pk).order_by('pk')
+            .values_list(*EXPORT_LOOKUPS)[:chunk_size]
+        )
+        if not chunk:
+            return
+        yield from chunk
+        last_pk = chunk[-1][0]
+
+
+def csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        writer.writerow(
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in row
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        line = json.dumps(dict(zip(EXPORT_FIELDS, row)),
+                          cls=DjangoJSONEncoder, ensure_ascii=False)
+        yield (line + '\n').encode()
+
+
+WRITERS = {
+    'csv': csv_lines,
+    'jsonl': jsonl_lines,
+}
+
+
+def gzip_stream(chunks, buffer_size=64 * 1024):
+    """Compress byte chunks to gzip stream on the fly."""
+    compressor = zlib.compressobj(wbits=31)
+    pending = []
+    size = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            data = compressor.compress(b''.join(pending))
+            pending, size = [], 0
+            if data:
+                yield data
+    yield compressor.compress(b''.join(pending)) + compressor.flush()
+
+
+def export_stream(file_format, compress=False,
+                  chunk_size=EXPORT_CHUNK_SIZE):
+    """Return iterator of bytes of all posts in csv or jsonl format."""
+    chunks = WRITERS[file_format](export_rows(chunk_size))
+    if compress:
+        return gzip_stream(chunks)
+    return chunks
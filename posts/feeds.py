@@ -0,0 +1,109 @@
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+
+from .caching import cache_anonymous_page, conditional_page
+from .models import Group, Post, User
+
+
+FEED_SIZE = 20
+
+
+class PostsFeed(Feed):
+    """Latest posts of the whole site."""
+    title = 'Yatube: последние обновления на сайте'
+    description = 'Новые записи всех авторов Yatube.'
+
+    def link(self):
+        return reverse('index')
+
+    def items(self):
+        return Post.objects.with_related()[:FEED_SIZE]
+
+    def item_title(self, item):
+        return Truncator(item.text).words(8)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('post', args=[item.author.username, item.pk])
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_updateddate(self, item):
+        return item.edited
+
+
+class GroupPostsFeed(PostsFeed):
+    """Latest posts of group."""
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, obj):
+        return f'Yatube: записи сообщества {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('group', args=[obj.slug])
+
+    def items(self, obj):
+        return obj.posts.with_related()[:FEED_SIZE]
+
+
+class AuthorPostsFeed(PostsFeed):
+    """Latest posts of author."""
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Yatube: записи автора {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return f'Новые записи @{obj.username}.'
+
+    def link(self, obj):
+        return reverse('profile', args=[obj.username])
+
+    def items(self, obj):
+        return obj.posts.with_related()[:FEED_SIZE]
+
+
+class PostsAtomFeed(PostsFeed):
+    feed_type = Atom1Feed
+    subtitle = PostsFeed.description
+
+
+class GroupPostsAtomFeed(GroupPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+class AuthorPostsAtomFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+def cached_feed(feed, scope):
+    """Serve feed bytes from page cache, 304 to unchanged scope."""
+    return conditional_page(scope)(cache_anonymous_page(scope)(feed))
+
+
+posts_rss = cached_feed(PostsFeed(), 'index')
+posts_atom = cached_feed(PostsAtomFeed(), 'index')
+group_rss = cached_feed(GroupPostsFeed(), 'group:{slug}')
+group_atom = cached_feed(GroupPostsAtomFeed(), 'group:{slug}')
+author_rss = cached_feed(AuthorPostsFeed(), 'profile:{username}')
+author_atom = cached_feed(AuthorPostsAtomFeed(), 'profile:{username}')
@@ -0,0 +1,136 @@
+import datetime
+import json
+import logging
+import random
+import traceback
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+def task(name):
+    """Register function as job task called with payload as kwargs."""
+    def decorator(func):
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def enqueue(task_name, key=None, delay=0, **kwargs):
+    """Queue task_name with kwargs, return the job.
+
+    Job is written in the current transaction, so it is queued only
+    when the change that needs it is committed. None is returned when
+    a pending job with the same key is already queued; that job is
+    moved up if it was due later.
+    """
+    job = Job(
+        name=task_name,
+        payload=json.dumps(kwargs),
+        key=key,
+        run_at=timezone.now() + datetime.timedelta(seconds=delay),
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+    )
+    if key is None:
+        job.save()
+        return job
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        Job.objects.filter(
+            key=key, status=Job.PENDING, run_at__gt=job.run_at,
+        ).update(run_at=job.run_at)
+        return None
+    return job
+
+
+def backoff(attempts):
+    """Return seconds to wait before attempt after attempts failed."""
+    delay = min(
+        settings.JOB_BACKOFF * 2 ** (attempts - 1), settings.JOB_BACKOFF_MAX)
+    # Jitter keeps jobs failed together from retrying together.
+    return delay * random.uniform(0.5, 1)
+
+
+def claim(limit):
+    """Take up to limit due jobs for this worker, oldest first."""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(Job.objects.filter(
+            status=Job.PENDING, run_at__lte=now,
+        ).order_by('run_at', 'pk').values_list('pk', flat=True)[:limit])
+        Job.objects.filter(pk__in=ids).update(
+            status=Job.RUNNING,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+    return list(Job.objects.filter(pk__in=ids).order_by('run_at', 'pk'))
+
+
+def release_stale():
+    """Queue again jobs whose worker was lost, return their number."""
+    lost = timezone.now() - datetime.timedelta(
+        seconds=settings.JOB_LOCK_TIMEOUT)
+    released = 0
+    for job in Job.objects.filter(status=Job.RUNNING, locked_at__lt=lost):
+        fail(job, 'Worker lost')
+        released += 1
+    return released
+
+
+def fail(job, error):
+    job.last_error = error
+    job.locked_at = None
+    if job.attempts >= job.max_attempts:
+        job.status = Job.FAILED
+    else:
+        job.status = Job.PENDING
+        job.run_at = timezone.now() + datetime.timedelta(
+            seconds=backoff(job.attempts))
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        # The same work was queued again meanwhile.
+        job.delete()
+
+
+def run_job(job):
+    """Run claimed job, delete it when done or schedule its retry."""
+    try:
+        TASKS[job.name](**json.loads(job.payload))
+    except Exception:
+        logger.exception('Job %s failed', job)
+        fail(job, traceback.format_exc())
+        return False
+    job.delete()
+    return True
+
+
+def run_in_thread(job):
+    close_old_connections()
+    try:
+        return run_job(job)
+    finally:
+        close_old_connections()
+
+
+def run_pending(limit=100):
+    """Run due jobs in this thread until none is left, return count."""
+    done = 0
+    while True:
+        jobs = claim(limit)
+        if not jobs:
+            return done
+        for job in jobs:
+            run_job(job)
+        done += len(jobs)
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts.benchmarks import benchmark_database, run_database_benchmarks
+
+
+class Command(BaseCommand):
+    help = ('Compare throughput of concurrent readers and writers with '
+            'stock SQLite connections and tuned yatube.sqlite3 setup.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=5)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            results = run_database_benchmarks(
+                options['posts'], options['readers'], options['writers'],
+                options['seconds'])
+        for profile, metrics in results.items():
+            self.stdout.write(
+                f'{profile:<8} '
+                f'reads {metrics["reads"]["per_second"]:9.1f}/s '
+                f'p95 {metrics["reads"]["p95_ms"]:8.2f} ms  '
+                f'writes {metrics["writes"]["per_second"]:8.1f}/s '
+                f'p95 {metrics["writes"]["p95_ms"]:8.2f} ms  '
+                f'errors {metrics["errors"]}')
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts.benchmarks import (TEMPLATE_PROFILES, benchmark_database,
+                              run_template_benchmarks)
+
+
+class Command(BaseCommand):
+    help = ('Compare render time of index.html and profile.html with '
+            'uncached and cached template loaders.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            results = run_template_benchmarks(
+                options['posts'], options['requests'])
+        for name, profiles in results.items():
+            baseline = profiles['uncached']['p50_ms']
+            for profile in TEMPLATE_PROFILES:
+                metrics = profiles[profile]
+                self.stdout.write(
+                    f'{name:<14} {profile:<12} '
+                    f'p50 {metrics["p50_ms"]:7.3f} ms  '
+                    f'p95 {metrics["p95_ms"]:7.3f} ms  '
+                    f'{1 - metrics["p50_ms"] / baseline:6.1%} faster')
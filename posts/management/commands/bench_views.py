@@ -0,0 +1,62 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.benchmarks import (SKIPPED_URLS, benchmark_database,
+                              compare_results, missing_cases, run_benchmarks)
+
+
+class Command(BaseCommand):
+    help = ('Measure latency percentiles, queries and response size of '
+            'every URL on seeded datasets of growing size. Runs against '
+            'a throwaway test database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[1000, 100000],
+            help='Numbers of posts in datasets.')
+        parser.add_argument('--requests', type=int, default=20)
+        parser.add_argument('--output', help='File to save results to.')
+        parser.add_argument(
+            '--compare', help='Results of previous run to check against.')
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Allowed growth share before metric counts as regression.')
+
+    def handle(self, *args, **options):
+        missing = missing_cases()
+        if missing:
+            raise CommandError(
+                f'No benchmark case for URLs: {", ".join(missing)}.')
+        for name, reason in SKIPPED_URLS.items():
+            self.stdout.write(f'Skipping {name}: {reason}.')
+
+        with benchmark_database():
+            results = run_benchmarks(
+                options['sizes'], options['requests'], self.report)
+
+        if options['output']:
+            with open(options['output'], 'w') as stream:
+                json.dump(results, stream, indent=2, sort_keys=True)
+        if options['compare']:
+            with open(options['compare']) as stream:
+                previous = json.load(stream)
+            regressions = compare_results(
+                previous, results, options['threshold'])
+            for item in regressions:
+                self.stdout.write(self.style.ERROR(
+                    '{size} {url} {client} {metric}: '
+                    '{previous} -> {current}'.format(**item)))
+            if regressions:
+                raise CommandError(f'{len(regressions)} regressions found.')
+            self.stdout.write(self.style.SUCCESS('No regressions.'))
+
+    def report(self, size, name, clients):
+        for client, metrics in clients.items():
+            self.stdout.write(
+                f'{size:>9} {name:<18} {client:<9} {metrics["status"]} '
+                f'p50 {metrics["p50_ms"]:8.2f} ms  '
+                f'p95 {metrics["p95_ms"]:8.2f} ms  '
+                f'p99 {metrics["p99_ms"]:8.2f} ms  '
+                f'{metrics["queries"]:5.1f} queries  '
+                f'{metrics["bytes"]} bytes')
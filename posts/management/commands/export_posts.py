@@ -0,0 +1,31 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts.export import EXPORT_CHUNK_SIZE, WRITERS, export_stream
+
+
+class Command(BaseCommand):
+    help = 'Export posts joined with authors and groups as CSV or JSONL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Output file, standard output by default.')
+        parser.add_argument('--format', choices=WRITERS, default='jsonl')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument(
+            '--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        chunks = export_stream(
+            options['format'], options['gzip'], options['chunk_size'])
+        if options['path'] == '-':
+            output = sys.stdout.buffer
+            for chunk in chunks:
+                output.write(chunk)
+            output.flush()
+            return
+        with open(options['path'], 'wb') as output:
+            for chunk in chunks:
+                output.write(chunk)
@@ -0,0 +1,212 @@
+import csv
+import itertools
+import json
+import os
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.caching import bump_page_generation
+from posts.counters import TOTAL_POSTS_KEY, recount_posts
+from posts.jobs import enqueue
+from posts.models import Follow, Group, Post, User
+
+
+def read_jsonl(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+READERS = {
+    'jsonl': read_jsonl,
+    'csv': read_csv,
+}
+
+
+def insert_posts(posts):
+    """Insert posts keeping pub_date and edited given in import file.
+
+    bulk_create would stamp them with the current time, as auto_now
+    fields set their value on every save.
+    """
+    fields = [field for field in Post._meta.concrete_fields
+              if not field.primary_key]
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(Post._meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [
+            [field.get_db_prep_save(getattr(post, field.attname), connection)
+             for field in fields]
+            for post in posts
+        ])
+
+
+class Lookup:
+    """Cache of name to id, creating rows that are missing in bulk."""
+    def __init__(self, model, field, make):
+        self.model = model
+        self.field = field
+        self.make = make
+        self.ids = {}
+
+    def resolve(self, rows):
+        names = {name for name, _ in rows if name not in self.ids}
+        if not names:
+            return
+        existing = self.model.objects.filter(
+            **{f'{self.field}__in': names}).values_list(self.field, 'pk')
+        self.ids.update(existing)
+        missing = {name: row for name, row in rows if name not in self.ids}
+        if missing:
+            self.model.objects.bulk_create(
+                self.make(name, row) for name, row in missing.items())
+            created = self.model.objects.filter(
+                **{f'{self.field}__in': missing}).values_list(
+                    self.field, 'pk')
+            self.ids.update(created)
+
+    def __getitem__(self, name):
+        return self.ids[name]
+
+
+def row_date(value, default):
+    if not value:
+        return default
+    moment = parse_datetime(value)
+    if moment is None:
+        raise CommandError(f'Malformed pub_date: {value}.')
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, timezone.utc)
+    return moment
+
+
+def make_user(username, row):
+    # Imported users get unusable password: no PBKDF2 round per row.
+    return User(
+        username=username,
+        email=row.get('email') or '',
+        first_name=row.get('first_name') or '',
+        last_name=row.get('last_name') or '',
+        password=make_password(None),
+    )
+
+
+def make_group(slug, row):
+    return Group(
+        slug=slug,
+        title=row.get('group_title') or slug,
+        description=row.get('group_description') or '',
+    )
+
+
+class Command(BaseCommand):
+    help = ('Import posts with their authors and groups from JSONL or CSV '
+            'file. Rows have text, author, optional group and pub_date; '
+            'email, first_name, last_name, group_title and '
+            'group_description are used for new users and groups. '
+            'Feeds of followers of imported authors are filled by '
+            'run_workers.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=READERS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Skip rows committed by interrupted previous run.')
+        parser.add_argument(
+            '--checkpoint',
+            help='File with number of committed rows, PATH.checkpoint '
+                 'by default.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(path)[1][1:]
+        if file_format not in READERS:
+            raise CommandError(f'Unknown file format: {file_format}.')
+        checkpoint = options['checkpoint'] or path + '.checkpoint'
+        skip = 0
+        if options['resume'] and os.path.exists(checkpoint):
+            with open(checkpoint) as stream:
+                skip = int(stream.read() or 0)
+            self.stdout.write(f'Resuming after {skip} rows.')
+
+        self.users = Lookup(User, 'username', make_user)
+        self.groups = Lookup(Group, 'slug', make_group)
+        done = skip
+        started = time.monotonic()
+        with open(path, newline='', encoding='utf-8') as stream:
+            rows = itertools.islice(READERS[file_format](stream), skip, None)
+            while True:
+                chunk = list(itertools.islice(rows, options['batch_size']))
+                if not chunk:
+                    break
+                with transaction.atomic():
+                    self.import_chunk(chunk, done + 1)
+                done += len(chunk)
+                self.save_checkpoint(checkpoint, done)
+                rate = (done - skip) / (time.monotonic() - started)
+                self.stdout.write(f'{done} rows, {rate:.0f} rows/s')
+
+        recount_posts()
+        bump_page_generation(
+            'index',
+            *(f'profile:{name}' for name in self.users.ids),
+            *(f'group:{slug}' for slug in self.groups.ids),
+        )
+        cache.delete(TOTAL_POSTS_KEY)
+        followed = Follow.objects.filter(
+            author_id__in=self.users.ids.values(),
+        ).values_list('author_id', flat=True).distinct()
+        for author_id in followed:
+            enqueue('backfill_followers',
+                    key=f'backfill_followers:{author_id}',
+                    author_id=author_id)
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(f'Imported {done} rows.'))
+
+    def import_chunk(self, chunk, first):
+        """Import chunk of rows, the first of them numbered first."""
+        for number, row in enumerate(chunk, first):
+            missing = [name for name in ('author', 'text')
+                       if not row.get(name)]
+            if missing:
+                raise CommandError(
+                    f'Row {number} has no {", ".join(missing)}.')
+        now = timezone.now()
+        self.users.resolve([(row['author'], row) for row in chunk])
+        self.groups.resolve(
+            [(row['group'], row) for row in chunk if row.get('group')])
+        posts = []
+        for row in chunk:
+            pub_date = row_date(row.get('pub_date'), now)
+            posts.append(Post(
+                text=row['text'],
+                author_id=self.users[row['author']],
+                group_id=self.groups[row['group']] if row.get('group')
+                else None,
+                pub_date=pub_date,
+                edited=pub_date,
+            ))
+        insert_posts(posts)
+
+    def save_checkpoint(self, checkpoint, done):
+        temporary = checkpoint + '.tmp'
+        with open(temporary, 'w') as stream:
+            stream.write(str(done))
+        os.replace(temporary, checkpoint)
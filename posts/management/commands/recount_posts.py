@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import recount_comments, recount_follows, recount_posts
+
+
+class Command(BaseCommand):
+    help = ('Recompute post counters of authors and groups, follow '
+            'counters of authors and comment counters of posts.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            authors, groups = recount_posts()
+            follows = recount_follows()
+            posts = recount_comments()
+        self.stdout.write(self.style.SUCCESS(
+            f'Recounted posts of {authors} authors and {groups} groups, '
+            f'follows of {follows} authors, comments of {posts} posts.'))
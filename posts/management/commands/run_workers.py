@@ -0,0 +1,39 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.jobs import claim, release_stale, run_in_thread
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs in a pool of threads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=settings.JOB_WORKERS)
+        parser.add_argument(
+            '--interval', type=float, default=settings.JOB_POLL_INTERVAL,
+            help='Seconds to wait when no job is due.')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit when no job is due instead of waiting for more.')
+
+    def handle(self, *args, **options):
+        done = failed = 0
+        with ThreadPoolExecutor(options['threads']) as pool:
+            while True:
+                release_stale()
+                jobs = claim(options['threads'])
+                if not jobs:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+                    continue
+                for succeeded in pool.map(run_in_thread, jobs):
+                    if succeeded:
+                        done += 1
+                    else:
+                        failed += 1
+        self.stdout.write(f'Done {done} jobs, {failed} failed.')
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.seeding import seed
+
+
+class Command(BaseCommand):
+    help = ('Fill database with synthetic users, groups and posts for '
+            'benchmarks. Existing seed rows are kept.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        created = seed(options['users'], options['groups'], options['posts'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {created} posts in '
+            f'{time.monotonic() - started:.1f} s.'))
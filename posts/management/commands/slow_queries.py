@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from posts.slow_queries import aggregates, clear
+
+
+class Command(BaseCommand):
+    help = ('Show slow SQL statements grouped by fingerprint with their '
+            'count, total and p95 time.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--order', choices=['total_ms', 'count', 'p95_ms'],
+            default='total_ms')
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument(
+            '--plans', action='store_true', help='Show sampled query plans.')
+        parser.add_argument(
+            '--clear', action='store_true', help='Empty slow query log.')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            clear()
+            self.stdout.write(self.style.SUCCESS('Slow query log cleared.'))
+            return
+        for query in aggregates(options['order'])[:options['limit']]:
+            self.stdout.write(
+                f'{query["fingerprint"]}  {query["count"]:>6}x  '
+                f'total {query["total_ms"]:10.1f} ms  '
+                f'p95 {query["p95_ms"]:8.1f} ms')
+            self.stdout.write(f'    {query["statement"]}')
+            self.stdout.write(f'    views: {", ".join(query["views"])}')
+            self.stdout.write(f'    from: {"; ".join(query["origins"])}')
+            if options['plans'] and query['plan']:
+                self.stdout.write(f'    plan: {query["plan"]}')
@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.replicas import replica_path, sync_replica
+
+
+class Command(BaseCommand):
+    help = 'Copy default database into read-only replica file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep syncing every --interval seconds.')
+        parser.add_argument(
+            '--interval', type=float, default=settings.REPLICA_SYNC_INTERVAL)
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            if sync_replica():
+                self.stdout.write(
+                    f'Synced {replica_path()} in '
+                    f'{time.monotonic() - started:.2f} s.')
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
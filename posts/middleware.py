@@ -0,0 +1,173 @@
+import contextlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Template
+
+from . import replicas, slow_queries
+
+logger = logging.getLogger('posts.timing')
+
+# Timings of request handled by current thread, None outside of it.
+_local = threading.local()
+
+
+class RequestTimings:
+    def __init__(self):
+        self.db = 0.0
+        self.queries = 0
+        self.template = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+
+def timed_render(render):
+    """Wrap Template.render to add outermost render time to timings.
+
+    Included templates render inside their parent, so only the top
+    level call is counted.
+    """
+    def wrapper(self, context):
+        timings = getattr(_local, 'timings', None)
+        if timings is None:
+            return render(self, context)
+        timings.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            timings.template_depth -= 1
+            if not timings.template_depth:
+                timings.template += time.perf_counter() - started
+    wrapper.timed = True
+    return wrapper
+
+
+def server_timing(metrics):
+    return ', '.join(
+        f'{name};dur={duration * 1000:.2f}' + (f';desc="{desc}"' if desc
+                                               else '')
+        for name, duration, desc in metrics
+    )
+
+
+class ServerTimingMiddleware:
+    """Report SQL, template, view and total time of every request.
+
+    Times go to Server-Timing header and to "posts.timing" log line
+    tagged with URL name. Enabled by SERVER_TIMING setting, otherwise
+    Django drops the middleware at startup and requests pay nothing.
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVER_TIMING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if not getattr(Template.render, 'timed', False):
+            Template.render = timed_render(Template.render)
+
+    def __call__(self, request):
+        timings = _local.timings = RequestTimings()
+        request._view_started = None
+        started = time.perf_counter()
+        try:
+            with contextlib.ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            _local.timings = None
+        finished = time.perf_counter()
+        total = finished - started
+        view = (finished - request._view_started
+                if request._view_started is not None else 0.0)
+        match = request.resolver_match
+        url_name = match.view_name if match is not None else '-'
+        response['Server-Timing'] = server_timing([
+            ('db', timings.db, f'{timings.queries} queries'),
+            ('tpl', timings.template, ''),
+            ('view', view, url_name),
+            ('mw', total - view, ''),
+            ('total', total, ''),
+        ])
+        logger.info(
+            'url=%s status=%s total=%.2f view=%.2f db=%.2f queries=%d '
+            'tpl=%.2f',
+            url_name, response.status_code, total * 1000, view * 1000,
+            timings.db * 1000, timings.queries, timings.template * 1000,
+            extra={
+                'url_name': url_name,
+                'status': response.status_code,
+                'total_ms': total * 1000,
+                'view_ms': view * 1000,
+                'db_ms': timings.db * 1000,
+                'queries': timings.queries,
+                'template_ms': timings.template * 1000,
+            },
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._view_started = time.perf_counter()
+
+
+class SlowQueryMiddleware:
+    """Tag slow queries recorded during request with URL name of view.
+
+    Used only when SLOW_QUERY_THRESHOLD is set.
+    """
+    def __init__(self, get_response):
+        if settings.SLOW_QUERY_THRESHOLD is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            slow_queries.set_view(None)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        slow_queries.set_view(request.resolver_match.view_name)
+
+
+class ReplicaMiddleware:
+    """Let GET requests of REPLICA_VIEWS read from replica database.
+
+    Visitor who has just sent a form gets REPLICA_PIN_COOKIE and reads
+    from default database until it expires, so their own changes are
+    seen before replica catches up.
+    """
+    def __init__(self, get_response):
+        if settings.REPLICA_DATABASE not in settings.DATABASES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            replicas.use_replica(False)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        replicas.use_replica(
+            request.method in ('GET', 'HEAD')
+            and request.resolver_match.url_name in settings.REPLICA_VIEWS
+            and settings.REPLICA_PIN_COOKIE not in request.COOKIES
+            and replicas.replica_available()
+        )
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from posts.search import create_search_index, drop_search_index
+
+
+def create_index(apps, schema_editor):
+    create_search_index(schema_editor)
+
+
+def drop_index(apps, schema_editor):
+    drop_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_post_edited'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
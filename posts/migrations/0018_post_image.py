@@ -0,0 +1,23 @@
+# Generated by Django 2.2.6 on 2026-10-18 05:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_comments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, help_text='Загрузите картинку. Это необязательно.', upload_to='posts/', verbose_name='картинка'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='thumbnails',
+            field=models.TextField(default='', editable=False),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.6 on 2026-10-18 05:54
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_post_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='задача')),
+                ('payload', models.TextField(default='{}', verbose_name='аргументы')),
+                ('key', models.CharField(blank=True, max_length=200, null=True, verbose_name='ключ')),
+                ('status', models.CharField(choices=[('pending', 'ожидает'), ('running', 'выполняется'), ('failed', 'не выполнено')], default='pending', max_length=10, verbose_name='состояние')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='попыток')),
+                ('max_attempts', models.PositiveIntegerField(default=5, verbose_name='попыток всего')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='выполнить после')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='взято в работу')),
+                ('last_error', models.TextField(blank=True, verbose_name='последняя ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='добавлено')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(status='pending'), fields=('key',), name='job_pending_key_uniq'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
 
 
 User = get_user_model()
@@ -19,17 +20,29 @@ class Group(models.Model):
         help_text=('Слаг должен быть уникальным. Используйье только '
                    'латиницу, цифры, дефисы и знаки подчёркивания.'),
     )
+    posts_count = models.PositiveIntegerField(
+        'число записей',
+        null=True,
+        editable=False,
+    )
 
     def __str__(self):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def with_related(self):
+        """Fetch author and group of posts in the same query."""
+        return self.select_related("author", "group")
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='текст',
         help_text='Напишите текст Вашей новой записи. Это обязательно.',
     )
     pub_date = models.DateTimeField("date published", auto_now_add=True)
+    edited = models.DateTimeField("date edited", auto_now=True, db_index=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -44,9 +57,196 @@ class Post(models.Model):
         related_name="posts",
         help_text='Выберите группу. Это необязательно.',
     )
+    image = models.ImageField(
+        verbose_name='картинка',
+        upload_to='posts/',
+        blank=True,
+        help_text='Загрузите картинку. Это необязательно.',
+    )
+    # JSON of thumbnails made from image: {size: [name, width, height]}.
+    thumbnails = models.TextField(default='', editable=False)
+    comments_count = models.PositiveIntegerField(
+        'число комментариев',
+        default=0,
+        editable=False,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ("-pub_date",)
+        # Ascending indexes: scanned backwards they give -pub_date with
+        # the implicit rowid as descending tiebreak for keyset pages.
+        indexes = (
+            models.Index(fields=["pub_date"], name="post_pub_date_idx"),
+            models.Index(
+                fields=["group", "pub_date"],
+                name="post_group_pub_date_idx",
+            ),
+            models.Index(
+                fields=["author", "pub_date"],
+                name="post_author_pub_date_idx",
+            ),
+        )
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class Comment(models.Model):
+    post = models.ForeignKey(
+        Post,
+        verbose_name='запись',
+        on_delete=models.CASCADE,
+        related_name="comments",
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name='автор',
+        on_delete=models.CASCADE,
+        related_name="comments",
+    )
+    text = models.TextField(
+        verbose_name='текст',
+        help_text='Напишите комментарий.',
+    )
+    created = models.DateTimeField("date created", auto_now_add=True)
+
+    class Meta:
+        ordering = ("-created",)
+        indexes = (
+            models.Index(
+                fields=["post", "created"],
+                name="comment_post_created_idx",
+            ),
+        )
 
     def __str__(self):
         return self.text[:15]
+
+
+class AuthorStats(models.Model):
+    """Counters of author activity maintained on post create and delete.
+
+    Missing row means counters were never computed, see posts.counters.
+    """
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+    )
+    posts_count = models.PositiveIntegerField("число записей", default=0)
+    followers_count = models.PositiveIntegerField(
+        "число подписчиков", default=0)
+    following_count = models.PositiveIntegerField("число подписок", default=0)
+
+    def __str__(self):
+        return f"{self.author_id}: {self.posts_count}"
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        verbose_name="подписчик",
+        on_delete=models.CASCADE,
+        related_name="follower",
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name="автор",
+        on_delete=models.CASCADE,
+        related_name="following",
+    )
+
+    class Meta:
+        unique_together = ("user", "author")
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.author_id}"
+
+
+class TimelineEntry(models.Model):
+    """Post of followed author copied into follower feed on creation.
+
+    pub_date repeats the post one so a feed page is read from the
+    (user, pub_date) index alone, see posts.timeline.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="timeline",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    pub_date = models.DateTimeField("date published")
+
+    class Meta:
+        unique_together = ("user", "post")
+        indexes = (
+            models.Index(
+                fields=["user", "pub_date", "post"],
+                name="timeline_user_pub_date_idx",
+            ),
+        )
+
+    def __str__(self):
+        return f"{self.user_id}: {self.post_id}"
+
+
+class Job(models.Model):
+    """Background work stored until a worker has done it, see posts.jobs.
+
+    Only one pending job may have a given key, so repeated changes
+    queue the work once.
+    """
+    PENDING = "pending"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATUSES = (
+        (PENDING, "ожидает"),
+        (RUNNING, "выполняется"),
+        (FAILED, "не выполнено"),
+    )
+
+    name = models.CharField("задача", max_length=100)
+    payload = models.TextField("аргументы", default="{}")
+    key = models.CharField("ключ", max_length=200, null=True, blank=True)
+    status = models.CharField(
+        "состояние",
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+    )
+    attempts = models.PositiveIntegerField("попыток", default=0)
+    max_attempts = models.PositiveIntegerField("попыток всего", default=5)
+    run_at = models.DateTimeField("выполнить после", default=timezone.now)
+    locked_at = models.DateTimeField("взято в работу", null=True, blank=True)
+    last_error = models.TextField("последняя ошибка", blank=True)
+    created = models.DateTimeField("добавлено", auto_now_add=True)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=["status", "run_at"],
+                name="job_status_run_at_idx",
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=["key"],
+                condition=models.Q(status="pending"),
+                name="job_pending_key_uniq",
+            ),
+        )
+
+    def __str__(self):
+        return f"{self.name} #{self.pk}"
@@ -0,0 +1,193 @@
+import datetime
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils import timezone
+
+
+POSTS_PER_PAGE = 10
+# Page links shown around current page and at both ends of the range.
+PAGE_LINKS_ON_EACH_SIDE = 3
+PAGE_LINKS_ON_ENDS = 1
+# From this page number on "next" link leads to cursor pages, which
+# read an index range instead of skipping OFFSET rows.
+CURSOR_FROM_PAGE = 10
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=timezone.utc)
+# Cursor bounds: datetime range around EPOCH and SQLite INTEGER ids.
+MICROSECOND = datetime.timedelta(microseconds=1)
+MIN_MICROS = (datetime.datetime.min.replace(tzinfo=timezone.utc)
+              - EPOCH) // MICROSECOND
+MAX_MICROS = (datetime.datetime.max.replace(tzinfo=timezone.utc)
+              - EPOCH) // MICROSECOND
+MAX_PK = 2 ** 63 - 1
+
+
+def page_window(number, num_pages, on_each_side=PAGE_LINKS_ON_EACH_SIDE,
+                on_ends=PAGE_LINKS_ON_ENDS):
+    """Return page numbers to link to, None where pages are skipped.
+
+    Only numbers shown are computed: first and last on_ends pages and
+    on_each_side pages around current one: 1 None 6 7 8 9 10 11 12 None
+    5000 for page 9 of 5000.
+    """
+    if num_pages <= (on_each_side + on_ends) * 2 + 1:
+        return list(range(1, num_pages + 1))
+    window = []
+    if number > on_each_side + on_ends + 1:
+        window += list(range(1, on_ends + 1)) + [None]
+        start = number - on_each_side
+    else:
+        start = 1
+    if number < num_pages - on_each_side - on_ends:
+        end = number + on_each_side
+        tail = [None] + list(range(num_pages - on_ends + 1, num_pages + 1))
+    else:
+        end = num_pages
+        tail = []
+    return window + list(range(start, end + 1)) + tail
+
+
+def make_cursor(moment, pk):
+    """Return cursor string for (moment, id) position."""
+    delta = moment - EPOCH
+    micros = (delta.days * 86400 + delta.seconds) * 10 ** 6
+    return f'{micros + delta.microseconds}-{pk}'
+
+
+def encode_cursor(post):
+    """Return cursor string for post position in (pub_date, id) order."""
+    return make_cursor(post.pub_date, post.pk)
+
+
+def decode_cursor(cursor):
+    """Return (moment, id) pair from cursor or None if it is malformed.
+
+    Out of range time or id is malformed too, as it can't be turned
+    into datetime or SQLite INTEGER. Id 0 is kept for cursors pointing
+    before the first post, as in ?since=0-0 of API sync.
+    """
+    try:
+        micros, pk = (int(part) for part in cursor.rsplit('-', 1))
+    except (AttributeError, ValueError):
+        return None
+    if not MIN_MICROS <= micros <= MAX_MICROS or not 0 <= pk <= MAX_PK:
+        return None
+    try:
+        return EPOCH + datetime.timedelta(microseconds=micros), pk
+    except OverflowError:
+        return None
+
+
+class KeysetPage:
+    """Page of posts selected by cursor instead of LIMIT/OFFSET.
+
+    Quacks like django Page for templates: iterable, has_next,
+    has_previous and has_other_pages work the same way. Cursors are
+    taken from field of first and last objects, pub_date for posts.
+    """
+    is_keyset = True
+
+    def __init__(self, object_list, has_next, has_previous,
+                 field='pub_date'):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.field = field
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous and bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if self.object_list:
+            last = self.object_list[-1]
+            return make_cursor(getattr(last, self.field), last.pk)
+
+    @property
+    def previous_cursor(self):
+        if self.object_list:
+            first = self.object_list[0]
+            return make_cursor(getattr(first, self.field), first.pk)
+
+
+def keyset_queryset(queryset, before=None, after=None, field='pub_date',
+                    tiebreak='pk'):
+    """Return queryset ordered and filtered to start next to cursor.
+
+    Posts are ordered by Post.Meta.ordering with id as tiebreak, so each
+    page is one index range scan regardless of how deep it is. The plain
+    pub_date bound is what lets the database seek into the index; an
+    OR of two ranges makes SQLite merge them and sort the result.
+    Other indexed datetime field and tiebreak column may be given
+    instead of pub_date and id.
+    """
+    if after is not None:
+        moment, pk = after
+        return queryset.filter(
+            Q(**{f'{field}__gt': moment}) | Q(**{f'{tiebreak}__gt': pk}),
+            **{f'{field}__gte': moment},
+        ).order_by(field, tiebreak)
+    queryset = queryset.order_by(f'-{field}', f'-{tiebreak}')
+    if before is not None:
+        moment, pk = before
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt': moment}) | Q(**{f'{tiebreak}__lt': pk}),
+            **{f'{field}__lte': moment},
+        )
+    return queryset
+
+
+def keyset_page(queryset, before=None, after=None, per_page=POSTS_PER_PAGE,
+                field='pub_date'):
+    """Return KeysetPage of posts older than before or newer than after."""
+    rows = list(
+        keyset_queryset(queryset, before, after, field)[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if after is not None:
+        return KeysetPage(rows[::-1], True, has_more, field)
+    return KeysetPage(rows, has_more, before is not None, field)
+
+
+def paginate(request, queryset, per_page=POSTS_PER_PAGE, count=None):
+    """Return page and paginator context for post list views.
+
+    ?before=<cursor> and ?after=<cursor> switch to keyset pagination,
+    otherwise the usual ?page=<number> Paginator is used. Known count
+    of posts (counter, cached or estimated value) saves the COUNT(*)
+    query; if it was off and the page came out empty, the real count
+    is taken so out of range numbers still clamp to the last page.
+    Numbered pages from CURSOR_FROM_PAGE on get next_cursor, so going
+    deeper continues with keyset pages.
+    """
+    before = decode_cursor(request.GET.get('before'))
+    after = decode_cursor(request.GET.get('after'))
+    if before is not None or after is not None:
+        page = keyset_page(queryset, before, after, per_page)
+        return {"page": page, "paginator": None}
+    paginator = Paginator(queryset, per_page)
+    if count is not None:
+        # Paginator.count is a cached_property, preset value replaces it.
+        paginator.count = count
+    page = paginator.get_page(request.GET.get('page'))
+    if count is not None and not page.object_list:
+        paginator = Paginator(queryset, per_page)
+        page = paginator.get_page(request.GET.get('page'))
+    if page.number >= CURSOR_FROM_PAGE and page.has_next():
+        page.next_cursor = encode_cursor(page[len(page) - 1])
+    return {"page": page, "paginator": paginator}
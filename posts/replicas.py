@@ -0,0 +1,132 @@
+import os
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from yatube.sqlite3.base import database_path
+
+# Whether current thread serves request allowed to read from replica.
+_local = threading.local()
+
+
+def use_replica(enabled):
+    _local.enabled = enabled
+
+
+def replica_path():
+    return database_path(
+        connections[settings.REPLICA_DATABASE].settings_dict['NAME'])
+
+
+def replica_available():
+    """Replica takes reads once synced, until its copy gets too old.
+
+    Copy unchanged since the last sync is touched by sync_replica, so
+    old copy means syncing has stopped and default database is read.
+    """
+    if settings.REPLICA_DATABASE not in settings.DATABASES:
+        return False
+    try:
+        synced = os.stat(replica_path()).st_mtime
+    except OSError:
+        return False
+    return time.time() - synced < settings.REPLICA_MAX_AGE
+
+
+def sync_number(path):
+    """Return number of sync that wrote replica at path, 0 without one."""
+    if not os.path.exists(path):
+        return 0
+    replica = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        return replica.execute('PRAGMA user_version').fetchone()[0]
+    finally:
+        replica.close()
+
+
+def source_state(source):
+    """Return what changes when anything is committed to source.
+
+    PRAGMA data_version moves with commits of other connections,
+    total_changes with those of this one; both hold for this
+    connection only, so it is part of the state too.
+    """
+    with source.cursor() as cursor:
+        cursor.execute('PRAGMA data_version')
+        data_version = cursor.fetchone()[0]
+    return source.connection, data_version, source.connection.total_changes
+
+
+def sync_replica(using=DEFAULT_DB_ALIAS, path=None):
+    """Copy database into read-only replica file, return if it was copied.
+
+    Copy is written aside and moved over replica at once, so readers
+    see either old or new database, never half-written one. Every copy
+    is numbered in its user_version, higher than any copy before. When
+    nothing was committed since the last sync the copy is only touched,
+    so its number, and keys of pages cached from it, stay the same.
+    """
+    path = path or replica_path()
+    source = connections[using]
+    source.ensure_connection()
+    state = source_state(source)
+    if (getattr(source, 'replica_synced', None) == (path, state)
+            and os.path.exists(path)):
+        os.utime(path)
+        return False
+    temporary = path + '.tmp'
+    number = max(sync_number(path) + 1, int(time.time()))
+    target = sqlite3.connect(temporary)
+    try:
+        source.connection.backup(target)
+        # Read-only connections can't open WAL database without -shm file.
+        target.execute('PRAGMA journal_mode = DELETE').fetchall()
+        target.execute(f'PRAGMA user_version = {number:d}')
+    finally:
+        target.close()
+    os.replace(temporary, path)
+    source.replica_synced = path, state
+    return True
+
+
+def read_source():
+    """Return sync number of replica copy the current thread reads.
+
+    Empty string is returned when reads go to default database. Number
+    is read once per replica connection, as connection is reopened
+    when the replica file is replaced.
+    """
+    if not getattr(_local, 'enabled', False):
+        return ''
+    connection = connections[settings.REPLICA_DATABASE]
+    connection.ensure_connection()
+    synced = getattr(connection, 'sync_number', None)
+    if synced is None or synced[0] is not connection.connection:
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA user_version')
+            synced = connection.connection, cursor.fetchone()[0]
+        connection.sync_number = synced
+    return 'replica-{}'.format(synced[1])
+
+
+class ReplicaRouter:
+    """Send reads of REPLICA_APPS models to replica during requests
+    that ReplicaMiddleware let read from it, everything else to default.
+    """
+    def db_for_read(self, model, **hints):
+        if (getattr(_local, 'enabled', False)
+                and model._meta.app_label in settings.REPLICA_APPS):
+            return settings.REPLICA_DATABASE
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,137 @@
+import math
+
+from django.db import connection
+
+from .models import Post
+from .pagination import MAX_PK
+
+
+FTS_TABLE = 'posts_post_fts'
+
+CREATE_FTS_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"text, content='posts_post', content_rowid='id')",
+)
+CREATE_TRIGGERS_SQL = (
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON posts_post "
+    f"BEGIN INSERT INTO {FTS_TABLE}(rowid, text) "
+    f"VALUES (new.id, new.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON posts_post "
+    f"BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au "
+    f"AFTER UPDATE OF text ON posts_post "
+    f"BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+)
+DROP_SQL = (
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+)
+
+
+def fts_available(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def create_search_index(schema_editor):
+    """Create FTS5 index over posts_post and fill it from the table."""
+    if not fts_available(schema_editor.connection):
+        return
+    for sql in CREATE_FTS_SQL + CREATE_TRIGGERS_SQL:
+        schema_editor.execute(sql)
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def drop_search_index(schema_editor):
+    if not fts_available(schema_editor.connection):
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+def ensure_search_triggers(using):
+    """Recreate sync triggers, SQLite drops them when it remakes table."""
+    if not fts_available(using):
+        return
+    with using.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = %s", [FTS_TABLE])
+        if cursor.fetchone() is None:
+            return
+        for sql in CREATE_TRIGGERS_SQL:
+            cursor.execute(sql)
+
+
+def fts_query(text):
+    """Turn user input into FTS5 query matching all of its words."""
+    words = text.split()
+    return ' '.join('"{}"'.format(word.replace('"', '""')) for word in words)
+
+
+def encode_search_cursor(score, pk):
+    return f'{score!r}_{pk}'
+
+
+def decode_search_cursor(cursor):
+    """Return (score, id) from cursor or None if it is malformed."""
+    try:
+        score, pk = cursor.split('_')
+        score, pk = float(score), int(pk)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+    if not math.isfinite(score) or not 1 <= pk <= MAX_PK:
+        return None
+    return score, pk
+
+
+def search_post_ids(text, group=None, author=None, after=None, limit=10):
+    """Return (post id, score) pairs best matching text, best first.
+
+    After is (score, id) of last result on previous page.
+    """
+    query = fts_query(text)
+    if not query:
+        return []
+    if not fts_available():
+        posts = Post.objects.filter(text__icontains=text)
+        if group is not None:
+            posts = posts.filter(group=group)
+        if author is not None:
+            posts = posts.filter(author=author)
+        if after is not None:
+            posts = posts.filter(pk__gt=after[1])
+        return [(pk, 0.0) for pk in
+                posts.order_by('pk').values_list('pk', flat=True)[:limit]]
+    where = [f'{FTS_TABLE} MATCH %s']
+    params = [query]
+    if group is not None:
+        where.append('p.group_id = %s')
+        params.append(group.pk)
+    if author is not None:
+        where.append('p.author_id = %s')
+        params.append(author.pk)
+    sql = (
+        f"SELECT p.id, bm25({FTS_TABLE}) AS score FROM {FTS_TABLE} "
+        f"JOIN posts_post p ON p.id = {FTS_TABLE}.rowid "
+        f"WHERE {' AND '.join(where)}"
+    )
+    if after is not None:
+        sql = (f"SELECT id, score FROM ({sql}) "
+               f"WHERE score > %s OR (score = %s AND id > %s)")
+        params.extend([after[0], after[0], after[1]])
+    sql += " ORDER BY score, id LIMIT %s"
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def search_filter_sql(text):
+    """Return (sql, params) selecting ids of posts matching text."""
+    return (f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+            [fts_query(text)])
@@ -0,0 +1,119 @@
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .counters import recount_posts
+from .models import Group, Post, User
+
+
+SEED_USER = 'seed_user_{}'
+SEED_GROUP = 'seed_group_{}'
+SEED_TEXT = ('Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed '
+             'do eiusmod tempor incididunt ut labore et dolore magna aliqua.')
+BATCH_SIZE = 5000
+
+
+def seed_users(count):
+    """Create seed users up to count, return their ids in order."""
+    existing = User.objects.filter(username__startswith='seed_user_').count()
+    password = make_password(None)
+    User.objects.bulk_create(
+        (User(username=SEED_USER.format(number), password=password)
+         for number in range(existing, count)),
+        batch_size=BATCH_SIZE,
+    )
+    return list(User.objects.filter(
+        username__startswith='seed_user_').order_by('pk').values_list(
+            'pk', flat=True))
+
+
+def seed_groups(count):
+    """Create seed groups up to count, return their ids in order."""
+    existing = Group.objects.filter(slug__startswith='seed_group_').count()
+    Group.objects.bulk_create(
+        (Group(
+            slug=SEED_GROUP.format(number),
+            title=f'Seed group {number}',
+            description=SEED_TEXT,
+        ) for number in range(existing, count)),
+        batch_size=BATCH_SIZE,
+    )
+    return list(Group.objects.filter(
+        slug__startswith='seed_group_').order_by('pk').values_list(
+            'pk', flat=True))
+
+
+def insert_posts_sqlite(start, stop, user_ids, group_ids):
+    """Insert posts numbered start..stop with one INSERT ... SELECT.
+
+    Authors and groups are picked through temporary tables indexed by
+    post number modulo their count. Every third post has no group.
+    """
+    with connection.cursor() as cursor:
+        for table, ids in (('seed_authors', user_ids),
+                           ('seed_groups', group_ids)):
+            cursor.execute(f'DROP TABLE IF EXISTS temp.{table}')
+            cursor.execute(
+                f'CREATE TEMP TABLE {table} '
+                f'(idx INTEGER PRIMARY KEY, target INTEGER)')
+            cursor.executemany(
+                f'INSERT INTO {table} (idx, target) VALUES (%s, %s)',
+                list(enumerate(ids)),
+            )
+        now = timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+        cursor.execute(
+            "WITH RECURSIVE seq(n) AS ("
+            "  SELECT %s UNION ALL SELECT n + 1 FROM seq WHERE n < %s"
+            ") "
+            "INSERT INTO posts_post (text, pub_date, edited, author_id, "
+            "                        group_id, comments_count, image, "
+            "                        thumbnails) "
+            "SELECT 'Seed post ' || n || '. ' || %s, "
+            "       datetime(%s, '-' || n || ' seconds'), "
+            "       datetime(%s, '-' || n || ' seconds'), "
+            "       a.target, "
+            "       CASE WHEN n %% 3 = 0 THEN NULL ELSE g.target END, "
+            "       0, '', '' "
+            "FROM seq "
+            "JOIN temp.seed_authors a ON a.idx = n %% %s "
+            "LEFT JOIN temp.seed_groups g ON g.idx = n %% %s",
+            [start, stop - 1, SEED_TEXT, now, now,
+             len(user_ids), max(len(group_ids), 1)],
+        )
+        cursor.execute('DROP TABLE temp.seed_authors')
+        cursor.execute('DROP TABLE temp.seed_groups')
+
+
+def insert_posts_orm(start, stop, user_ids, group_ids):
+    for first in range(start, stop, BATCH_SIZE):
+        Post.objects.bulk_create(
+            Post(
+                text=f'Seed post {number}. {SEED_TEXT}',
+                author_id=user_ids[number % len(user_ids)],
+                group_id=(group_ids[number % len(group_ids)]
+                          if number % 3 and group_ids else None),
+            )
+            for number in range(first, min(first + BATCH_SIZE, stop))
+        )
+
+
+def seed(users, groups, posts):
+    """Grow seed data to given numbers of users, groups and posts.
+
+    Rows that already exist are kept, so datasets of growing size can
+    be built one after another. Return number of posts created.
+    """
+    with transaction.atomic():
+        user_ids = seed_users(users)
+        group_ids = seed_groups(groups)
+        existing = Post.objects.count()
+        if existing < posts:
+            if connection.vendor == 'sqlite':
+                insert_posts_sqlite(existing, posts, user_ids, group_ids)
+            else:
+                insert_posts_orm(existing, posts, user_ids, group_ids)
+        recount_posts()
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+    return max(posts - existing, 0)
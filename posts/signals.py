@@ -0,0 +1,155 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import counters, timeline
+from .caching import bump_card_version, bump_page_generation
+from .jobs import enqueue
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_card(sender, instance, **kwargs):
+    bump_card_version(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    group_ids = {instance.group_id, instance._loaded_group_id} - {None}
+    slugs = Group.objects.filter(pk__in=group_ids).values_list(
+        'slug', flat=True) if group_ids else []
+    bump_page_generation(
+        'index',
+        f'profile:{instance.author.username}',
+        *(f'group:{slug}' for slug in slugs),
+    )
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_pages(sender, instance, **kwargs):
+    bump_page_generation(f'group:{instance.slug}')
+
+
+@receiver(post_init, sender=Post)
+def remember_post_group(sender, instance, **kwargs):
+    # Deferred group_id must not be fetched just to remember it.
+    instance._loaded_group_id = instance.__dict__.get('group_id')
+
+
+@receiver(post_init, sender=Post)
+def remember_post_image(sender, instance, **kwargs):
+    instance._loaded_image = image_name(instance)
+
+
+def image_name(post):
+    image = post.__dict__.get('image')
+    return getattr(image, 'name', image) or ''
+
+
+@receiver(post_save, sender=Post)
+def make_post_thumbnails(sender, instance, created, **kwargs):
+    name = image_name(instance)
+    if 'image' in instance.__dict__ and name != instance._loaded_image:
+        if not created:
+            # Thumbnails of replaced image are not shown any more.
+            instance.thumbnails = ''
+            Post.objects.filter(pk=instance.pk).update(thumbnails='')
+        if name:
+            enqueue(
+                'make_thumbnails',
+                key=f'thumbnails:{instance.pk}:{name}',
+                post_id=instance.pk,
+                name=name,
+            )
+    instance._loaded_image = name
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    if created:
+        counters.change_total_posts(1)
+        counters.add_author_post(instance.author_id)
+        if instance.group_id is not None:
+            counters.add_group_post(instance.group_id)
+    elif ('group_id' in instance.__dict__
+            and instance.group_id != instance._loaded_group_id):
+        if instance._loaded_group_id is not None:
+            counters.remove_group_post(instance._loaded_group_id)
+        if instance.group_id is not None:
+            counters.add_group_post(instance.group_id)
+    instance._loaded_group_id = instance.__dict__.get('group_id')
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.change_total_posts(-1)
+    counters.remove_author_post(instance.author_id)
+    if instance.group_id is not None:
+        counters.remove_group_post(instance.group_id)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created:
+        enqueue('fan_out', key=f'fan_out:{instance.pk}', post_id=instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.change_follow_counts(instance.user_id, instance.author_id, 1)
+        enqueue(
+            'backfill',
+            key=f'backfill:{instance.user_id}:{instance.author_id}',
+            user_id=instance.user_id,
+            author_id=instance.author_id,
+        )
+        invalidate_follow_pages(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def count_unfollow(sender, instance, **kwargs):
+    counters.change_follow_counts(instance.user_id, instance.author_id, -1)
+    timeline.drop_author(instance.user_id, instance.author_id)
+    # Author posts are pushed again from now on, posts written while
+    # they were pulled are put into feeds of remaining followers.
+    if AuthorStats.objects.filter(
+            author_id=instance.author_id,
+            followers_count=settings.FEED_FANOUT_LIMIT - 1).exists():
+        enqueue(
+            'backfill_followers',
+            key=f'backfill_followers:{instance.author_id}',
+            author_id=instance.author_id,
+        )
+    invalidate_follow_pages(instance)
+
+
+def invalidate_follow_pages(follow):
+    usernames = User.objects.filter(
+        pk__in=[follow.user_id, follow.author_id],
+    ).values_list('username', flat=True)
+    bump_page_generation(*(f'profile:{name}' for name in usernames))
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.change_comments_count(instance.post_id, 1)
+    invalidate_comment_pages(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.change_comments_count(instance.post_id, -1)
+    invalidate_comment_pages(instance)
+
+
+def invalidate_comment_pages(comment):
+    # List pages catch up with comment counts when their cache expires,
+    # the post page itself is refreshed at once.
+    bump_card_version(comment.post_id)
+    usernames = User.objects.filter(
+        posts=comment.post_id).values_list('username', flat=True)
+    bump_page_generation(*(f'profile:{name}' for name in usernames))
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import traceback
+
+from django.conf import settings
+from django.utils import timezone
+
+# View and explain guard of current thread.
+_local = threading.local()
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+WHITESPACE = re.compile(r'\s+')
+SKIPPED_FRAMES = (
+    os.sep + 'django' + os.sep,
+    os.sep + 'site-packages' + os.sep,
+    __file__,
+)
+
+
+def normalize(sql):
+    """Return statement with literals and placeholders replaced by "?"."""
+    sql = STRING_LITERAL.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = NUMBER_LITERAL.sub('?', sql)
+    sql = PLACEHOLDER_LIST.sub('(...)', sql)
+    return WHITESPACE.sub(' ', sql).strip()
+
+
+def fingerprint(statement):
+    return hashlib.md5(statement.encode()).hexdigest()[:16]
+
+
+def stack_origin():
+    """Return "file:line in function" of innermost project frame."""
+    for frame in reversed(traceback.extract_stack()):
+        if not frame.filename.startswith(settings.BASE_DIR):
+            continue
+        if any(part in frame.filename for part in SKIPPED_FRAMES):
+            continue
+        path = os.path.relpath(frame.filename, settings.BASE_DIR)
+        return f'{path}:{frame.lineno} in {frame.name}'
+    return '-'
+
+
+def explain(connection, sql, params, many):
+    if many or not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    prefix = ('EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite'
+              else 'EXPLAIN ')
+    _local.explaining = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            return ' | '.join(str(row[-1]) for row in cursor.fetchall())
+    except Exception as error:
+        return f'failed: {error}'
+    finally:
+        _local.explaining = False
+
+
+def write_record(record):
+    line = json.dumps(record, ensure_ascii=False) + '\n'
+    with open(settings.SLOW_QUERY_LOG, 'a', encoding='utf-8') as stream:
+        stream.write(line)
+
+
+def observe(execute, sql, params, many, context):
+    """Execute wrapper recording statements slower than threshold.
+
+    Each record has normalized statement with its fingerprint, calling
+    view, stack origin and, for a sample of them, the query plan.
+    """
+    threshold = settings.SLOW_QUERY_THRESHOLD
+    if threshold is None or getattr(_local, 'explaining', False):
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = (time.perf_counter() - started) * 1000
+        if duration >= threshold:
+            statement = normalize(sql)
+            plan = None
+            if random.random() < settings.SLOW_QUERY_EXPLAIN_RATE:
+                plan = explain(context['connection'], sql, params, many)
+            write_record({
+                'time': timezone.now().isoformat(),
+                'fingerprint': fingerprint(statement),
+                'statement': statement,
+                'duration_ms': round(duration, 3),
+                'view': getattr(_local, 'view', None) or '-',
+                'origin': stack_origin(),
+                'plan': plan,
+            })
+
+
+def install(connection, **kwargs):
+    """Add observer to connection once, used on connection_created."""
+    if (settings.SLOW_QUERY_THRESHOLD is not None
+            and observe not in connection.execute_wrappers):
+        connection.execute_wrappers.append(observe)
+
+
+def set_view(name):
+    _local.view = name
+
+
+def read_records():
+    if not os.path.exists(settings.SLOW_QUERY_LOG):
+        return
+    with open(settings.SLOW_QUERY_LOG, encoding='utf-8') as stream:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+def percentile(values, share):
+    """Return nearest-rank percentile of values."""
+    ordered = sorted(values)
+    rank = max(int(round(share * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def aggregates(order='total_ms'):
+    """Return per fingerprint count, total and p95 time of slow queries.
+
+    Views and origins seen are kept with the latest plan sampled.
+    """
+    groups = {}
+    for record in read_records():
+        group = groups.setdefault(record['fingerprint'], {
+            'fingerprint': record['fingerprint'],
+            'statement': record['statement'],
+            'durations': [],
+            'views': set(),
+            'origins': set(),
+            'plan': None,
+        })
+        group['durations'].append(record['duration_ms'])
+        group['views'].add(record['view'])
+        group['origins'].add(record['origin'])
+        if record['plan']:
+            group['plan'] = record['plan']
+    result = []
+    for group in groups.values():
+        durations = group.pop('durations')
+        group.update(
+            count=len(durations),
+            total_ms=round(sum(durations), 3),
+            p95_ms=percentile(durations, 0.95),
+            views=sorted(group['views']),
+            origins=sorted(group['origins']),
+        )
+        result.append(group)
+    return sorted(result, key=lambda group: group[order], reverse=True)
+
+
+def clear():
+    if os.path.exists(settings.SLOW_QUERY_LOG):
+        os.remove(settings.SLOW_QUERY_LOG)
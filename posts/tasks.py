@@ -0,0 +1,27 @@
+from . import thumbnails, timeline
+from .jobs import task
+from .models import Follow, Post
+
+
+@task('fan_out')
+def fan_out(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        timeline.fan_out(post)
+
+
+@task('backfill')
+def backfill(user_id, author_id):
+    # Follow may have been undone before the job ran.
+    if Follow.objects.filter(user_id=user_id, author_id=author_id).exists():
+        timeline.backfill(user_id, author_id)
+
+
+@task('backfill_followers')
+def backfill_followers(author_id):
+    timeline.backfill_followers(author_id)
+
+
+@task('make_thumbnails')
+def make_thumbnails(post_id, name):
+    thumbnails.make_thumbnails(post_id, name)
@@ -0,0 +1,48 @@
+import os
+
+from django.template import TemplateSyntaxError, engines
+from django.template.loaders import cached
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt', '.xml')
+
+
+def loader_dirs(loaders):
+    """Yield template directories of loaders and loaders they wrap."""
+    for loader in loaders:
+        if hasattr(loader, 'loaders'):
+            yield from loader_dirs(loader.loaders)
+        elif hasattr(loader, 'get_dirs'):
+            yield from loader.get_dirs()
+
+
+def template_names(engine):
+    """Yield names of all templates found by loaders of engine."""
+    directories = list(loader_dirs(engine.template_loaders))
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith(TEMPLATE_EXTENSIONS):
+                    path = os.path.join(root, filename)
+                    yield os.path.relpath(path, directory).replace(
+                        os.sep, '/')
+
+
+def precompile_templates(engine=None):
+    """Compile every template once, return number of templates compiled.
+
+    Meant for worker start, so cached loader has all templates before
+    the first request. Does nothing unless engine caches templates.
+    """
+    if engine is None:
+        engine = engines['django'].engine
+    if not any(isinstance(loader, cached.Loader)
+               for loader in engine.template_loaders):
+        return 0
+    compiled = 0
+    for name in set(template_names(engine)):
+        try:
+            engine.get_template(name)
+        except TemplateSyntaxError:
+            continue
+        compiled += 1
+    return compiled
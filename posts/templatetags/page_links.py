@@ -0,0 +1,12 @@
+from django import template
+
+from posts.pagination import page_window
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_numbers(page):
+    """Return windowed page numbers of page, None stands for a gap."""
+    return page_window(page.number, page.paginator.num_pages)
@@ -0,0 +1,58 @@
+from django import template
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from posts.caching import CARD_TIMEOUT, card_key, card_versions, read_source
+from posts.thumbnails import stored_thumbnail
+
+
+register = template.Library()
+
+
+def page_cards(context, layout, editable):
+    """Return {post_id: html} of cached cards of the whole page.
+
+    Versions and cards of all posts on page are read with one cache
+    call each at the first card, later cards are taken from the result.
+    """
+    cards = context.render_context.setdefault('post_cards', {})
+    if (layout, editable) not in cards:
+        page = context.get('page') or ()
+        versions = card_versions([post.pk for post in page])
+        source = read_source()
+        keys = {
+            pk: card_key(pk, editable, layout, version, source)
+            for pk, version in versions.items()
+        }
+        found = cache.get_many(list(keys.values()))
+        cards[layout, editable] = {
+            pk: found.get(key) for pk, key in keys.items()
+        }
+    return cards[layout, editable]
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post, layout='card'):
+    """Render post card once per post version and serve it from cache.
+
+    Layout names template in posts/cards of the page the card is shown
+    on. Author sees edit button, so cards are cached apart for author
+    and for everybody else.
+    """
+    user = context.get('user')
+    editable = user is not None and user.pk == post.author_id
+    html = page_cards(context, layout, editable).get(post.pk)
+    if html is None:
+        html = render_to_string(
+            'posts/cards/{}.html'.format(layout),
+            {'post': post, 'editable': editable},
+        )
+        cache.set(card_key(post.pk, editable, layout), html, CARD_TIMEOUT)
+    return mark_safe(html)
+
+
+@register.simple_tag
+def post_thumbnail(post, size):
+    """Return stored thumbnail of post image, None until it is made."""
+    return stored_thumbnail(post, size)
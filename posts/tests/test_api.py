@@ -0,0 +1,143 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+
+FEED_URL = reverse('api_feed')
+
+
+class PostApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='bob')
+        cls.group = Group.objects.create(
+            title='Test group title',
+            description='About test group',
+            slug='slug_one',
+        )
+        for i in range(15):
+            Post.objects.create(
+                text=f'Test post {i}',
+                author=cls.user,
+                group=cls.group if i < 5 else None,
+            )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def get_json(self, url, params=None):
+        response = self.guest_client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        if response.streaming:
+            return json.loads(b''.join(response.streaming_content))
+        return json.loads(response.content)
+
+    def test_feeds_return_posts_of_their_scope(self):
+        """Feed, group and author feeds list their own posts."""
+        feeds = {
+            FEED_URL: 10,
+            reverse('api_group_feed', args=['slug_one']): 5,
+            reverse('api_author_feed', args=['bob']): 10,
+        }
+        for url, expected in feeds.items():
+            with self.subTest(url=url):
+                data = self.get_json(url)
+                self.assertEqual(len(data['results']), expected)
+
+    def test_feed_cursor_pages_through_all_posts(self):
+        """Next cursor continues feed until it ends."""
+        data = self.get_json(FEED_URL, {'fields': 'id'})
+        ids = [row['id'] for row in data['results']]
+        data = self.get_json(FEED_URL, {'fields': 'id',
+                                        'before': data['next']})
+        ids += [row['id'] for row in data['results']]
+        self.assertIsNone(data['next'])
+        expected = Post.objects.order_by('-pub_date', '-pk')
+        self.assertEqual(ids, list(expected.values_list('pk', flat=True)))
+
+    def test_fields_selection(self):
+        """Only requested fields are returned, unknown ones are refused."""
+        post = Post.objects.first()
+        data = self.get_json(
+            reverse('api_post', args=[post.pk]), {'fields': 'text,author'})
+        self.assertEqual(data, {'text': post.text, 'author': 'bob'})
+        response = self.guest_client.get(FEED_URL, {'fields': 'password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_out_of_range_cursor_is_refused(self):
+        """Cursor beyond datetime or integer range is a client error."""
+        cursors = ['999999999999999999999-1', '1-99999999999999999999999',
+                   '-99999999999999999999-1', '1--5']
+        for name in ('before', 'since'):
+            for cursor in cursors:
+                with self.subTest(name=name, cursor=cursor):
+                    response = self.guest_client.get(
+                        FEED_URL, {name: cursor})
+                    self.assertEqual(response.status_code, 400)
+
+    def test_since_returns_only_changed_posts(self):
+        """Sync by since cursor gets new and edited posts only."""
+        data = self.get_json(FEED_URL, {'since': '0-0', 'limit': 100})
+        self.assertEqual(len(data['results']), 15)
+        since = data['next']
+        data = self.get_json(FEED_URL, {'since': since})
+        self.assertEqual(data, {'results': [], 'next': since})
+        post = Post.objects.order_by('pk').first()
+        post.text = 'Edited post'
+        post.save()
+        data = self.get_json(FEED_URL, {'since': since, 'fields': 'id,text'})
+        self.assertEqual(
+            data['results'], [{'id': post.pk, 'text': 'Edited post'}])
+
+
+class PostFeedsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='bob')
+        cls.group = Group.objects.create(
+            title='Test group title',
+            description='About test group',
+            slug='slug_one',
+        )
+        cls.post = Post.objects.create(
+            text='Syndicated post', author=cls.user, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_feeds_list_posts_of_scope(self):
+        """RSS and Atom feeds of site, group and author list posts."""
+        urls = (
+            reverse('feed_rss'),
+            reverse('feed_atom'),
+            reverse('group_feed_rss', args=['slug_one']),
+            reverse('group_feed_atom', args=['slug_one']),
+            reverse('author_feed_rss', args=['bob']),
+            reverse('author_feed_atom', args=['bob']),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, 'Syndicated post')
+
+    def test_feed_cached_until_scope_changes(self):
+        """Feed is answered from cache or with 304 until new post."""
+        url = reverse('group_feed_atom', args=['slug_one'])
+        etag = self.guest_client.get(url)['ETag']
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.filter(pk=PostFeedsTests.post.pk).update(
+            text='Changed behind signals')
+        self.assertContains(self.guest_client.get(url), 'Syndicated post')
+        Post.objects.create(
+            text='Second post', author=self.user, group=self.group)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Second post')
@@ -0,0 +1,162 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.benchmarks import compare_results, missing_cases, run_benchmarks
+from posts.jobs import run_pending
+from posts.models import AuthorStats, Follow, Group, Post, TimelineEntry
+
+
+IMPORT_ROWS = [
+    {'text': 'Imported one', 'author': 'anna', 'group': 'cats',
+     'group_title': 'Cats', 'pub_date': '2020-01-01T10:00:00'},
+    {'text': 'Imported two', 'author': 'anna'},
+    {'text': 'Imported three', 'author': 'boris', 'group': 'cats'},
+]
+
+
+class ImportPostsCommandTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'posts.jsonl')
+        with open(self.path, 'w') as stream:
+            for row in IMPORT_ROWS:
+                stream.write(json.dumps(row) + '\n')
+
+    def test_import_creates_posts_users_and_groups(self):
+        """Posts are imported with new authors, groups and counters."""
+        get_user_model().objects.create(username='boris')
+        call_command('import_posts', self.path, batch_size=2,
+                     stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 3)
+        anna = get_user_model().objects.get(username='anna')
+        self.assertFalse(anna.has_usable_password())
+        self.assertEqual(Group.objects.get(slug='cats').title, 'Cats')
+        self.assertEqual(Group.objects.get(slug='cats').posts_count, 2)
+        self.assertEqual(AuthorStats.objects.get(author=anna).posts_count, 2)
+        post = Post.objects.get(text='Imported one')
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertEqual(post.edited, post.pub_date)
+        self.assertFalse(os.path.exists(self.path + '.checkpoint'))
+
+    def test_imported_posts_reach_follower_feeds(self):
+        """Followers of imported authors get their posts in feed."""
+        boris = get_user_model().objects.create(username='boris')
+        reader = get_user_model().objects.create(username='reader')
+        Follow.objects.create(user=reader, author=boris)
+        run_pending()
+        call_command('import_posts', self.path, stdout=StringIO())
+        run_pending()
+        self.assertEqual(
+            list(TimelineEntry.objects.filter(user=reader).values_list(
+                'post__text', flat=True)),
+            ['Imported three'],
+        )
+
+    def test_row_without_text_is_reported_by_number(self):
+        """Incomplete row stops import with its number."""
+        with open(self.path, 'a') as stream:
+            stream.write(json.dumps({'author': 'anna'}) + '\n')
+        with self.assertRaisesMessage(CommandError, 'Row 4 has no text.'):
+            call_command('import_posts', self.path, batch_size=2,
+                         stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_import_resumes_after_committed_rows(self):
+        """With --resume rows before checkpoint are not imported again."""
+        with open(self.path + '.checkpoint', 'w') as stream:
+            stream.write('2')
+        call_command('import_posts', self.path, resume=True,
+                     stdout=StringIO())
+        self.assertEqual(
+            list(Post.objects.values_list('text', flat=True)),
+            ['Imported three'],
+        )
+
+
+class ExportPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='anna')
+        cls.group = Group.objects.create(
+            title='Cats', description='About cats', slug='cats')
+        for i in range(5):
+            Post.objects.create(
+                text=f'Exported {i}',
+                author=cls.user,
+                group=cls.group if i % 2 else None,
+            )
+
+    def test_export_command_writes_all_posts(self):
+        """Command reads posts in chunks and writes every row once."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'posts.jsonl.gz')
+        call_command('export_posts', path, gzip=True, chunk_size=2)
+        with gzip.open(path, 'rt') as stream:
+            rows = [json.loads(line) for line in stream]
+        self.assertEqual([row['text'] for row in rows],
+                         [f'Exported {i}' for i in range(5)])
+        self.assertEqual(rows[1]['group'], 'cats')
+        self.assertEqual(rows[1]['author'], 'anna')
+
+    def test_export_endpoint_is_staff_only(self):
+        """Export streams csv to staff, others are sent to login."""
+        url = reverse('export_posts')
+        response = Client().get(url)
+        self.assertEqual(response.status_code, 302)
+        staff = get_user_model().objects.create(
+            username='staff', is_staff=True)
+        client = Client()
+        client.force_login(staff)
+        response = client.get(url, {'format': 'csv'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,text,pub_date,edited,author,group,'
+                                   'group_title')
+        self.assertEqual(len(lines), 6)
+
+
+class SeedDataCommandTests(TestCase):
+    def test_seed_data_grows_dataset(self):
+        """Seed data is created up to requested size and can grow."""
+        call_command('seed_data', users=3, groups=2, posts=30,
+                     stdout=StringIO())
+        call_command('seed_data', users=3, groups=2, posts=45,
+                     stdout=StringIO())
+        self.assertEqual(get_user_model().objects.count(), 3)
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 45)
+        self.assertEqual(Post.objects.filter(group=None).count(), 15)
+        self.assertEqual(
+            sum(AuthorStats.objects.values_list('posts_count', flat=True)),
+            45)
+
+
+class BenchViewsTests(TestCase):
+    def test_every_url_has_benchmark_case(self):
+        """New URL has to get benchmark case or reason to skip it."""
+        self.assertEqual(missing_cases(), [])
+
+    def test_run_benchmarks_and_compare(self):
+        """Benchmark measures URLs and reports grown metrics only."""
+        results = run_benchmarks([20], requests=1)
+        metrics = results['20']['index']['anonymous']
+        self.assertEqual(metrics['status'], 200)
+        self.assertGreater(metrics['bytes'], 0)
+        previous = json.loads(json.dumps(results))
+        previous['20']['index']['anonymous']['queries'] = 0.5
+        regressions = compare_results(previous, results)
+        self.assertEqual(
+            [(item['url'], item['client'], item['metric'])
+             for item in regressions],
+            [('index', 'anonymous', 'queries')])
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.counters import recount_comments
+from posts.models import Comment, Post
+from posts.pagination import POSTS_PER_PAGE
+
+
+class CommentTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = get_user_model().objects.create(username='author')
+        cls.reader = get_user_model().objects.create(username='reader')
+        cls.post = Post.objects.create(
+            text='Commented post', author=cls.author)
+        cls.post_url = reverse('post', args=['author', cls.post.id])
+        cls.comment_url = reverse('add_comment', args=['author', cls.post.id])
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def comments_count(self):
+        return Post.objects.get(pk=self.post.pk).comments_count
+
+    def test_comment_is_shown_and_counted(self):
+        """Posted comment appears on post page and in stored counter."""
+        response = self.client.post(self.comment_url, {'text': 'Nice post'})
+        self.assertRedirects(response, self.post_url)
+        self.assertEqual(self.comments_count(), 1)
+        response = self.client.get(self.post_url)
+        self.assertContains(response, 'Nice post')
+        self.assertContains(response, 'Комментариев: 1')
+        for url in (reverse('index'), reverse('profile', args=['author'])):
+            with self.subTest(url=url):
+                self.assertContains(
+                    self.client.get(url), 'Комментариев: 1')
+        Comment.objects.get().delete()
+        self.assertEqual(self.comments_count(), 0)
+
+    def test_guest_can_not_comment(self):
+        """Guest is sent to login, comment is not saved."""
+        response = Client().post(self.comment_url, {'text': 'Spam'})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Comment.objects.exists())
+        response = self.client.get(self.comment_url)
+        self.assertEqual(response.status_code, 405)
+
+    def test_comments_are_paginated_by_cursor(self):
+        """Comments page newest first and cursors walk both ways."""
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.reader, text=f'Comment {i}')
+            for i in range(POSTS_PER_PAGE + 2))
+        response = self.client.get(self.post_url)
+        first = response.context['comments']
+        self.assertEqual(len(first), POSTS_PER_PAGE)
+        self.assertTrue(first.has_next())
+        response = self.client.get(
+            self.post_url, {'before': first.next_cursor})
+        second = response.context['comments']
+        self.assertEqual(len(second), 2)
+        self.assertFalse(second.has_next())
+        response = self.client.get(
+            self.post_url, {'after': second.previous_cursor})
+        self.assertEqual(
+            list(response.context['comments']), list(first))
+
+    def test_recount_comments_fixes_counter(self):
+        """Comments written around signals are counted by recount."""
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.reader, text='Bulk')
+            for _ in range(3))
+        self.assertEqual(self.comments_count(), 0)
+        recount_comments()
+        self.assertEqual(self.comments_count(), 3)
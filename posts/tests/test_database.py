@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+
+from django.db import OperationalError, connection
+from django.test import TestCase
+
+from yatube.sqlite3.base import DatabaseWrapper
+
+
+class TunedSqliteBackendTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings = dict(
+            connection.settings_dict,
+            NAME=os.path.join(directory, 'db.sqlite3'),
+            HEALTH_CHECKS=True,
+            TRANSACTION_MODE='IMMEDIATE',
+        )
+        self.wrapper = DatabaseWrapper(settings)
+        self.addCleanup(self.wrapper.close)
+
+    def pragma(self, name):
+        with self.wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_new_connection_gets_pragmas(self):
+        """Connections use WAL journal and configured pragmas."""
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('foreign_keys'), 1)
+
+    def test_transaction_takes_write_lock_at_start(self):
+        """Transaction begins with write lock held, not on first write."""
+        self.wrapper._start_transaction_under_autocommit()
+        other = DatabaseWrapper(dict(
+            self.wrapper.settings_dict, PRAGMAS={'busy_timeout': 0}))
+        self.addCleanup(other.close)
+        try:
+            with self.assertRaisesMessage(OperationalError, 'locked'):
+                with other.cursor() as cursor:
+                    cursor.execute('BEGIN IMMEDIATE')
+        finally:
+            self.wrapper.connection.execute('ROLLBACK')
+
+    def test_broken_connection_is_dropped(self):
+        """Health check closes connection that stopped working."""
+        self.wrapper.ensure_connection()
+        self.assertTrue(self.wrapper.is_usable())
+        self.wrapper.connection.close()
+        self.wrapper.close_if_unusable_or_obsolete()
+        self.assertIsNone(self.wrapper.connection)
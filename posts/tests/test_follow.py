@@ -0,0 +1,140 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.counters import recount_follows, recount_posts
+from posts.jobs import run_pending
+from posts.models import AuthorStats, Follow, Post, TimelineEntry
+from posts.pagination import encode_cursor
+
+
+FOLLOW_URL = reverse('follow_index')
+
+
+class FollowTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = get_user_model().objects.create(username='reader')
+        cls.author = get_user_model().objects.create(username='author')
+        cls.star = get_user_model().objects.create(username='star')
+        cls.old_post = Post.objects.create(
+            text='Written before follow', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def follow(self, author):
+        return self.client.post(
+            reverse('profile_follow', args=[author.username]))
+
+    def feed_texts(self, **params):
+        response = self.client.get(FOLLOW_URL, params)
+        return [post.text for post in response.context['page']]
+
+    def stats(self, user):
+        return AuthorStats.objects.get(author=user)
+
+    def test_follow_and_unfollow_keep_stored_counts(self):
+        """Follow counters are stored and shown on profile."""
+        self.follow(self.author)
+        self.follow(self.author)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        response = self.client.get(
+            reverse('profile', args=[self.author.username]))
+        self.assertContains(response, 'Подписчиков: 1')
+        self.assertTrue(response.context['following'])
+        self.client.post(
+            reverse('profile_unfollow', args=[self.author.username]))
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_user_can_not_follow_self(self):
+        """Following own profile does nothing."""
+        self.follow(self.reader)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_follow_needs_post(self):
+        """Links can't make user follow somebody."""
+        response = self.client.get(
+            reverse('profile_follow', args=[self.author.username]))
+        self.assertEqual(response.status_code, 405)
+
+    def test_feed_gets_new_and_recent_posts_of_followed_authors(self):
+        """Recent posts are backfilled, new ones are fanned out."""
+        self.follow(self.author)
+        Post.objects.create(text='Written after follow', author=self.author)
+        Post.objects.create(text='Not followed', author=self.star)
+        self.assertEqual(self.feed_texts(), [])
+        run_pending()
+        self.assertEqual(
+            self.feed_texts(),
+            ['Written after follow', 'Written before follow'])
+        self.client.post(
+            reverse('profile_unfollow', args=[self.author.username]))
+        self.assertEqual(self.feed_texts(), [])
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_prolific_author_posts_are_pulled(self):
+        """Posts of authors with many followers are read, not copied."""
+        self.follow(self.star)
+        self.follow(self.author)
+        Follow.objects.create(user=self.author, author=self.reader)
+        star_post = Post.objects.create(text='Star post', author=self.star)
+        Post.objects.create(text='Author post', author=self.author)
+        run_pending()
+        self.assertFalse(
+            TimelineEntry.objects.filter(post=star_post).exists())
+        self.assertEqual(
+            self.feed_texts(),
+            ['Author post', 'Star post', 'Written before follow'])
+
+    @override_settings(FEED_FANOUT_LIMIT=2)
+    def test_posts_pulled_from_author_stay_after_unfollows(self):
+        """Author falling below the limit has pulled posts pushed."""
+        self.follow(self.star)
+        fan = Follow.objects.create(user=self.author, author=self.star)
+        star_post = Post.objects.create(text='Star post', author=self.star)
+        run_pending()
+        self.assertFalse(
+            TimelineEntry.objects.filter(post=star_post).exists())
+        fan.delete()
+        run_pending()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=star_post).exists())
+        self.assertEqual(self.feed_texts(), ['Star post'])
+
+    def test_feed_pages_follow_cursor(self):
+        """Feed is paged by cursor like the other post lists."""
+        self.follow(self.author)
+        run_pending()
+        Post.objects.bulk_create(
+            Post(text=f'Bulk {i}', author=self.author) for i in range(12))
+        for post in Post.objects.filter(text__startswith='Bulk'):
+            TimelineEntry.objects.create(
+                user=self.reader, post=post, author=self.author,
+                pub_date=post.pub_date)
+        response = self.client.get(FOLLOW_URL)
+        first_page = list(response.context['page'])
+        self.assertEqual(len(first_page), 10)
+        second_page = self.feed_texts(before=encode_cursor(first_page[-1]))
+        expected = Post.objects.order_by('-pub_date', '-pk')[10:13]
+        self.assertEqual(second_page, [post.text for post in expected])
+
+    def test_recount_keeps_follow_counts(self):
+        """Recounting posts leaves follow counters alone, recounting
+        follows restores them from follows table.
+        """
+        self.follow(self.author)
+        recount_posts()
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        AuthorStats.objects.update(followers_count=7, following_count=7)
+        recount_follows()
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        self.assertEqual(self.stats(self.reader).followers_count, 0)
@@ -0,0 +1,97 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from posts.jobs import (TASKS, claim, enqueue, release_stale, run_job,
+                        run_pending)
+from posts.models import Job
+
+
+def broken_task(**kwargs):
+    raise ValueError('broken')
+
+
+@override_settings(JOB_BACKOFF=10, JOB_MAX_ATTEMPTS=2)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.calls = []
+        patcher = mock.patch.dict(TASKS, {
+            'record': lambda **kwargs: self.calls.append(kwargs),
+            'broken': broken_task,
+        })
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pending_job_key_is_queued_once(self):
+        """Same key is not queued twice until the job is taken."""
+        self.assertIsNotNone(enqueue('record', key='post:1', value=1))
+        self.assertIsNone(enqueue('record', key='post:1', value=1))
+        claim(10)
+        self.assertIsNotNone(enqueue('record', key='post:1', value=1))
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_done_job_is_deleted(self):
+        """Task gets payload as kwargs, job is removed after it."""
+        enqueue('record', value=1)
+        enqueue('record', value=2, delay=60)
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(self.calls, [{'value': 1}])
+        self.assertEqual(Job.objects.get().payload, '{"value": 2}')
+
+    def test_failed_job_backs_off_then_fails(self):
+        """Failed job is retried later until attempts run out."""
+        job = enqueue('broken')
+        started = timezone.now()
+        with self.assertLogs('posts.jobs', 'ERROR'):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.PENDING, 1))
+        self.assertIn('ValueError: broken', job.last_error)
+        self.assertGreaterEqual(
+            job.run_at, started + datetime.timedelta(seconds=5))
+        Job.objects.update(run_at=started)
+        with self.assertLogs('posts.jobs', 'ERROR'):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_retry_of_job_queued_again_is_dropped(self):
+        """Retry gives way to the same work queued while job ran."""
+        enqueue('broken', key='post:1')
+        job, = claim(10)
+        enqueue('broken', key='post:1')
+        with self.assertLogs('posts.jobs', 'ERROR'):
+            self.assertFalse(run_job(job))
+        self.assertEqual(Job.objects.get().attempts, 0)
+
+    @override_settings(JOB_LOCK_TIMEOUT=60)
+    def test_job_of_lost_worker_is_released(self):
+        """Job running past lock timeout is queued again."""
+        enqueue('record')
+        claim(10)
+        self.assertEqual(release_stale(), 0)
+        Job.objects.update(
+            locked_at=timezone.now() - datetime.timedelta(minutes=5))
+        self.assertEqual(release_stale(), 1)
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.last_error),
+                         (Job.PENDING, 'Worker lost'))
+
+
+class RunWorkersCommandTests(TransactionTestCase):
+    def test_workers_drain_queue(self):
+        """Command runs due jobs in threads and reports them."""
+        calls = []
+        with mock.patch.dict(
+                TASKS, {'record': lambda **kwargs: calls.append(kwargs)}):
+            for number in range(5):
+                enqueue('record', number=number)
+            out = StringIO()
+            call_command('run_workers', '--once', '--threads=2', stdout=out)
+        self.assertEqual(out.getvalue(), 'Done 5 jobs, 0 failed.\n')
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(len(calls), 5)
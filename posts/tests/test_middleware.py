@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+
+class ServerTimingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='bob')
+        cls.post = Post.objects.create(text='Timed post', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_no_header_when_disabled(self):
+        """Without SERVER_TIMING the middleware is not used at all."""
+        response = Client().get(reverse('index'))
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(SERVER_TIMING=True)
+    def test_header_and_log_line(self):
+        """Timings of request go to header and log tagged with URL name."""
+        client = Client()
+        client.force_login(self.user)
+        with self.assertLogs('posts.timing', 'INFO') as logs:
+            response = client.get(
+                reverse('post', args=[self.user.username, self.post.pk]))
+        header = response['Server-Timing']
+        for metric in ('db;dur=', 'tpl;dur=', 'view;dur=', 'total;dur='):
+            self.assertIn(metric, header)
+        self.assertIn('desc="post"', header)
+        record = logs.records[0]
+        self.assertEqual(record.url_name, 'post')
+        self.assertEqual(record.status, 200)
+        self.assertGreater(record.queries, 0)
+        self.assertIn(f'{record.queries} queries', header)
+        self.assertGreater(record.template_ms, 0)
+
+    @override_settings(SERVER_TIMING=True)
+    def test_unresolved_url(self):
+        """Requests without URL match are tagged with dash."""
+        with self.assertLogs('posts.timing', 'INFO') as logs:
+            Client().get('/no/such/page/')
+        self.assertEqual(logs.records[0].url_name, '-')
@@ -1,7 +1,10 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-from posts.models import Group, Post
+from posts.models import AuthorStats, Group, Post
 
 
 class PostModelTest(TestCase):
@@ -88,3 +91,52 @@ class GroupModelTest(TestCase):
         """
         expected_object_name = GroupModelTest.group.title
         self.assertEqual(expected_object_name, str(GroupModelTest.group))
+
+
+class PostCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='VovaPanov')
+        cls.group_one = Group.objects.create(
+            title='first', description='first group', slug='first')
+        cls.group_two = Group.objects.create(
+            title='second', description='second group', slug='second')
+
+    def counts(self):
+        return (
+            AuthorStats.objects.get(author=PostCountersTest.user).posts_count,
+            Group.objects.get(slug='first').posts_count,
+            Group.objects.get(slug='second').posts_count,
+        )
+
+    def test_counters_follow_post_create_edit_delete(self):
+        """Counters change with created, moved and deleted posts."""
+        post = Post.objects.create(
+            author=PostCountersTest.user,
+            text='Тестовый текст',
+            group=PostCountersTest.group_one,
+        )
+        Post.objects.create(
+            author=PostCountersTest.user,
+            text='Тестовый текст',
+            group=PostCountersTest.group_two,
+        )
+        self.assertEqual(self.counts(), (2, 1, 1))
+        post = Post.objects.get(pk=post.pk)
+        post.group = PostCountersTest.group_two
+        post.save()
+        self.assertEqual(self.counts(), (2, 0, 2))
+        post.delete()
+        self.assertEqual(self.counts(), (1, 0, 1))
+
+    def test_recount_posts_fixes_drift(self):
+        """recount_posts command writes real numbers of posts."""
+        Post.objects.bulk_create([
+            Post(author=PostCountersTest.user, text='Тестовый текст',
+                 group=PostCountersTest.group_one)
+            for _ in range(3)
+        ])
+        AuthorStats.objects.create(author=PostCountersTest.user)
+        call_command('recount_posts', stdout=StringIO())
+        self.assertEqual(self.counts(), (3, 3, 0))
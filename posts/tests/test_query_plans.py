@@ -0,0 +1,91 @@
+import os
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from posts.models import Group, Post
+from posts.pagination import keyset_queryset
+
+
+# Set YATUBE_PLAN_ROWS=5000000 to check plans against production-like table.
+SEED_ROWS = int(os.environ.get('YATUBE_PLAN_ROWS', 20000))
+BATCH_SIZE = 5000
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN')
+class PostFeedQueryPlanTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        users = [
+            get_user_model().objects.create(username=f'author_{i}')
+            for i in range(20)
+        ]
+        groups = [
+            Group.objects.create(
+                title=f'Group {i}',
+                description='About group',
+                slug=f'group_{i}',
+            )
+            for i in range(10)
+        ]
+        cls.author = users[0]
+        cls.group = groups[0]
+        cls.seed_posts(users, groups)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    @classmethod
+    def seed_posts(cls, users, groups):
+        now = timezone.now()
+        for start in range(0, SEED_ROWS, BATCH_SIZE):
+            stop = min(start + BATCH_SIZE, SEED_ROWS)
+            Post.objects.bulk_create(
+                Post(
+                    text=f'Seed post {i}',
+                    author=users[i % len(users)],
+                    group=groups[i % len(groups)] if i % 3 else None,
+                )
+                for i in range(start, stop)
+            )
+        # auto_now_add gives the whole batch nearly equal timestamps,
+        # spread them out like real traffic would.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE posts_post SET pub_date = "
+                "datetime(%s, '-' || id || ' seconds')",
+                [now.strftime('%Y-%m-%d %H:%M:%S')],
+            )
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return ' | '.join(row[-1] for row in cursor.fetchall())
+
+    def feed_querysets(self):
+        """Querysets and their cursor pages as list views build them."""
+        feeds = {
+            'index': Post.objects.select_related('group'),
+            'group_posts': self.group.posts.all(),
+            'profile': self.author.posts.all(),
+        }
+        middle = Post.objects.order_by('-pub_date')[SEED_ROWS // 2]
+        cursor = (middle.pub_date, middle.pk)
+        for name, queryset in feeds.items():
+            yield name, queryset[20:30]
+            yield name + ' before', keyset_queryset(
+                queryset, before=cursor)[:11]
+            yield name + ' after', keyset_queryset(
+                queryset, after=cursor)[:11]
+
+    def test_feed_queries_use_index_without_sort(self):
+        """Every list view reads its page through an index, no temp sort."""
+        for name, queryset in self.feed_querysets():
+            with self.subTest(view=name):
+                plan = self.explain(queryset)
+                self.assertIn('USING INDEX', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
@@ -0,0 +1,150 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import close_old_connections, connections
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from posts.models import Post
+from posts.replicas import (ReplicaRouter, replica_available, sync_number,
+                            sync_replica)
+from yatube.sqlite3.base import DatabaseWrapper
+
+
+INDEX_URL = reverse('index')
+
+
+class ReplicaRoutingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='bob')
+        Post.objects.create(text='Replicated post', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+        # Test replica mirrors default database but can't see rows of
+        # test transaction, so it is served by default connection and
+        # routing is checked on router answers.
+        replica = connections['replica']
+        connections['replica'] = connections['default']
+        self.addCleanup(connections.__setitem__, 'replica', replica)
+        self.routed = []
+        route = ReplicaRouter.db_for_read
+
+        def spy(router, model, **hints):
+            alias = route(router, model, **hints)
+            self.routed.append(alias)
+            return alias
+
+        for patcher in (
+            mock.patch('posts.replicas.replica_available',
+                       return_value=True),
+            mock.patch.object(ReplicaRouter, 'db_for_read', spy),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_public_views_read_posts_from_replica(self):
+        """GET of public views reads posts from replica."""
+        response = self.client.get(INDEX_URL)
+        self.assertContains(response, 'Replicated post')
+        self.assertIn('replica', self.routed)
+
+    def test_other_views_use_default(self):
+        """Form pages never read from replica."""
+        self.client.get(reverse('new'))
+        self.assertNotIn('replica', self.routed)
+
+    def test_writer_sticks_to_default(self):
+        """After sending form visitor reads from default database."""
+        response = self.client.post(reverse('new'), {'text': 'Fresh post'})
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        self.routed.clear()
+        response = self.client.get(INDEX_URL)
+        self.assertNotIn('replica', self.routed)
+        self.assertContains(response, 'Fresh post')
+
+
+class SyncReplicaTests(TransactionTestCase):
+    def test_sync_makes_read_only_copy(self):
+        """Synced replica has current posts and opens read-only."""
+        user = get_user_model().objects.create(username='bob')
+        Post.objects.create(text='Copied post', author=user)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'replica.sqlite3')
+        sync_replica(path=path)
+        replica = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        self.addCleanup(replica.close)
+        self.assertEqual(
+            replica.execute('SELECT text FROM posts_post').fetchall(),
+            [('Copied post',)])
+        with self.assertRaises(sqlite3.OperationalError):
+            replica.execute('DELETE FROM posts_post')
+
+
+class ReplicaLagTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'replica.sqlite3')
+        replica = connections['replica']
+        settings_dict = dict(
+            replica.settings_dict, NAME=f'file:{self.path}?mode=ro')
+        connections['replica'] = DatabaseWrapper(settings_dict, 'replica')
+        self.addCleanup(connections.__setitem__, 'replica', replica)
+        self.addCleanup(connections['replica'].close)
+
+    def test_lagging_replica_is_not_cached_as_current(self):
+        """Page read before sync is not served once edit is synced."""
+        user = get_user_model().objects.create(username='bob')
+        post = Post.objects.create(text='First text', author=user)
+        sync_replica(path=self.path)
+        url = reverse('post', args=['bob', post.id])
+        guest = Client()
+        self.assertContains(guest.get(url), 'First text')
+        post.text = 'Edited text'
+        post.save()
+        response = guest.get(url)
+        self.assertContains(response, 'First text')
+        self.assertFalse(response.has_header('Last-Modified'))
+        sync_replica(path=self.path)
+        # Server does it on request start, test client does not.
+        close_old_connections()
+        stale = guest.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(stale.status_code, 200)
+        self.assertContains(stale, 'Edited text')
+        self.assertContains(guest.get(INDEX_URL), 'Edited text')
+
+    def test_sync_without_changes_keeps_cached_pages(self):
+        """Copy of unchanged database keeps its number and ETags."""
+        user = get_user_model().objects.create(username='bob')
+        Post.objects.create(text='First text', author=user)
+        self.assertTrue(sync_replica(path=self.path))
+        number = sync_number(self.path)
+        guest = Client()
+        response = guest.get(INDEX_URL)
+        self.assertFalse(sync_replica(path=self.path))
+        self.assertEqual(sync_number(self.path), number)
+        close_old_connections()
+        response = guest.get(INDEX_URL, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_abandoned_replica_is_not_read(self):
+        """Copy not synced for REPLICA_MAX_AGE gives way to default."""
+        sync_replica(path=self.path)
+        self.assertTrue(replica_available())
+        synced = time.time() - settings.REPLICA_MAX_AGE - 1
+        os.utime(self.path, (synced, synced))
+        self.assertFalse(replica_available())
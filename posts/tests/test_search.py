@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+
+SEARCH_URL = reverse('search')
+
+
+class PostSearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_bob = get_user_model().objects.create(username='bob')
+        cls.user_john = get_user_model().objects.create(username='john')
+        cls.group = Group.objects.create(
+            title='Test group title',
+            description='About test group',
+            slug='slug_one',
+        )
+        for i in range(12):
+            Post.objects.create(
+                text=f'Kitten number {i} sleeps',
+                author=cls.user_bob,
+                group=cls.group if i % 2 else None,
+            )
+        cls.best = Post.objects.create(
+            text='Kitten kitten kitten',
+            author=cls.user_john,
+        )
+        Post.objects.create(text='Puppy plays', author=cls.user_john)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_search_ranks_results(self):
+        """Search returns matching posts only, most relevant first."""
+        response = self.guest_client.get(SEARCH_URL, {'q': 'kitten'})
+        page = list(response.context['page'])
+        self.assertEqual(len(page), 10)
+        self.assertEqual(page[0], PostSearchTests.best)
+        self.assertTrue(all('Kitten' in post.text for post in page))
+
+    def test_search_next_page_continues_results(self):
+        """Next page link brings remaining matches without repeats."""
+        response = self.guest_client.get(SEARCH_URL, {'q': 'kitten'})
+        first_page = list(response.context['page'])
+        response = self.guest_client.get(
+            SEARCH_URL + '?' + response.context['next_query'])
+        second_page = list(response.context['page'])
+        self.assertEqual(len(second_page), 3)
+        self.assertFalse(set(first_page) & set(second_page))
+        self.assertIsNone(response.context['next_query'])
+
+    def test_malformed_cursor_starts_from_best_match(self):
+        """Out of range or non-finite cursor is ignored, not an error."""
+        for cursor in ('1.0_99999999999999999999999', 'nan_5', 'inf_5',
+                       '1.0_0', '1e999_5'):
+            with self.subTest(cursor=cursor):
+                response = self.guest_client.get(
+                    SEARCH_URL, {'q': 'kitten', 'after': cursor})
+                page = list(response.context['page'])
+                self.assertEqual(page[0], PostSearchTests.best)
+
+    def test_search_filters_by_group_and_author(self):
+        """Group and author parameters narrow results."""
+        filters = {
+            'group': ('slug_one', 6),
+            'author': ('john', 1),
+        }
+        for name, (value, expected) in filters.items():
+            with self.subTest(name=name):
+                response = self.guest_client.get(
+                    SEARCH_URL, {'q': 'kitten', name: value})
+                self.assertEqual(len(response.context['page']), expected)
+
+    def test_search_index_follows_edit_and_delete(self):
+        """Edited and deleted posts are found by their current text."""
+        post = Post.objects.get(text='Puppy plays')
+        post.text = 'Parrot sings'
+        post.save()
+        response = self.guest_client.get(SEARCH_URL, {'q': 'parrot'})
+        self.assertEqual(list(response.context['page']), [post])
+        post.delete()
+        response = self.guest_client.get(SEARCH_URL, {'q': 'parrot'})
+        self.assertEqual(len(response.context['page']), 0)
+
+    def test_search_query_syntax_is_escaped(self):
+        """FTS operators in user input do not break search."""
+        response = self.guest_client.get(SEARCH_URL, {'q': 'kitten" OR ('})
+        self.assertEqual(response.status_code, 200)
+
+    def test_admin_search_uses_index(self):
+        """Admin post list finds posts through full-text index."""
+        admin = get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'puppy'})
+        self.assertEqual(response.context['cl'].result_count, 1)
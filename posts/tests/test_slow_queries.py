@@ -0,0 +1,77 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import slow_queries
+from posts.models import Post
+
+
+class NormalizeTests(TestCase):
+    def test_literals_are_normalized(self):
+        """Statements differing only in literals share fingerprint."""
+        first = slow_queries.normalize(
+            "SELECT * FROM t WHERE a = 'x' AND b = 12 AND c IN (%s, %s)")
+        second = slow_queries.normalize(
+            "SELECT *  FROM t\nWHERE a = 'it''s' AND b = 7 AND c IN (%s)")
+        self.assertEqual(
+            first, 'SELECT * FROM t WHERE a = ? AND b = ? AND c IN (...)')
+        self.assertEqual(first, second)
+
+
+class SlowQueryLogTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='bob')
+        cls.staff = get_user_model().objects.create(
+            username='admin', is_staff=True)
+        Post.objects.create(text='Slow post', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(os.rmdir, directory)
+        settings = override_settings(
+            SLOW_QUERY_THRESHOLD=0,
+            SLOW_QUERY_EXPLAIN_RATE=1,
+            SLOW_QUERY_LOG=os.path.join(directory, 'slow.jsonl'),
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(slow_queries.clear)
+
+    def test_queries_of_view_are_recorded(self):
+        """Records carry fingerprint, view, origin and sampled plan."""
+        with connection.execute_wrapper(slow_queries.observe):
+            Client().get(reverse('profile', args=[self.user.username]))
+        records = list(slow_queries.read_records())
+        self.assertTrue(records)
+        self.assertEqual({record['view'] for record in records},
+                         {'profile'})
+        post_query = [record for record in records
+                      if 'FROM "posts_post"' in record['statement']][0]
+        self.assertIn('posts/', post_query['origin'])
+        self.assertIn('posts_post', post_query['plan'])
+
+    def test_aggregates_command_and_staff_page(self):
+        """Aggregates are listed by command and on staff page."""
+        with connection.execute_wrapper(slow_queries.observe):
+            for _ in range(3):
+                Post.objects.filter(pk=1).exists()
+        query = slow_queries.aggregates()[0]
+        self.assertEqual(query['count'], 3)
+        self.assertEqual(query['views'], ['-'])
+        output = StringIO()
+        call_command('slow_queries', stdout=output)
+        self.assertIn(query['statement'], output.getvalue())
+        client = Client()
+        client.force_login(self.staff)
+        response = client.get(reverse('slow_queries'))
+        self.assertEqual(response.context['queries'][0]['count'], 3)
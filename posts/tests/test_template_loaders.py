@@ -0,0 +1,39 @@
+from django.contrib.auth.models import AnonymousUser
+from django.template import RequestContext
+from django.test import RequestFactory, TestCase
+
+from posts.benchmarks import TEMPLATE_PROFILES, template_engine
+from posts.template_loaders import precompile_templates
+
+
+class PrecompileTemplatesTests(TestCase):
+    def setUp(self):
+        self.engine = template_engine(TEMPLATE_PROFILES['cached'])
+
+    def test_precompile_fills_cached_loader(self):
+        """Pages and templates they include are compiled at warm-up."""
+        self.assertGreater(precompile_templates(self.engine), 10)
+        loader, = self.engine.template_loaders
+        for name in ('index.html', 'base.html', 'paginator.html',
+                     'posts/cards/index.html'):
+            with self.subTest(name=name):
+                self.assertIn(name, loader.get_template_cache)
+
+    def test_render_matches_uncached_loaders(self):
+        """Precompiled templates render the same page as plain loaders."""
+        precompile_templates(self.engine)
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        context = {'page': [], 'paginator': None}
+        plain = template_engine(TEMPLATE_PROFILES['uncached'])
+        self.assertEqual(
+            self.engine.get_template('index.html').render(
+                RequestContext(request, context)),
+            plain.get_template('index.html').render(
+                RequestContext(request, context)),
+        )
+
+    def test_uncached_engine_is_not_precompiled(self):
+        """Warm-up is skipped when templates are not cached anyway."""
+        plain = template_engine(TEMPLATE_PROFILES['uncached'])
+        self.assertEqual(precompile_templates(plain), 0)
@@ -0,0 +1,141 @@
+import io
+import json
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import thumbnails
+from posts.jobs import run_pending
+from posts.models import Job, Post
+
+
+INDEX_URL = reverse('index')
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image_upload(name='photo.png'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (1200, 800), 'teal').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+def run_workers_apart():
+    """Run run_workers as a separate process would, with its own cache.
+
+    Worker threads open new cache connections and in-memory caches
+    start empty, so only a cache shared between processes is seen.
+    """
+    with mock.patch.multiple(
+            'django.core.cache.backends.locmem',
+            _caches={}, _expire_info={}, _locks={}):
+        worker = threading.Thread(target=call_command, args=[
+            'run_workers', '--once', '--threads=1'], kwargs={
+            'stdout': io.StringIO()})
+        worker.start()
+        worker.join()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ThumbnailTests(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        # sorl-thumbnail 12.6 resizes with Image.ANTIALIAS removed in
+        # Pillow 10, where the same filter is called LANCZOS.
+        if not hasattr(Image, 'ANTIALIAS'):
+            patcher = mock.patch.object(
+                Image, 'ANTIALIAS', Image.LANCZOS, create=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        cache.clear()
+        self.user = get_user_model().objects.create(username='bob')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def new_post(self):
+        self.client.post(reverse('new'), {
+            'text': 'Post with image',
+            'image': image_upload(),
+        })
+        return Post.objects.get()
+
+    def test_upload_stores_thumbnails_of_every_size(self):
+        """Thumbnails are made by job and their sizes are stored."""
+        self.new_post()
+        run_pending()
+        post = Post.objects.get()
+        stored = json.loads(post.thumbnails)
+        self.assertEqual(set(stored), {'card', 'square'})
+        name, width, height = stored['card']
+        self.assertEqual((width, height), (960, 339))
+        self.assertTrue(post.image.storage.exists(name))
+
+    def test_list_page_renders_stored_thumbnail_without_pillow(self):
+        """Cards take thumbnail url and size from post, not from image."""
+        self.new_post()
+        run_pending()
+        post = Post.objects.get()
+        card = thumbnails.stored_thumbnail(post, 'card')
+        with mock.patch('PIL.Image.open') as image_open:
+            response = self.client.get(INDEX_URL)
+        image_open.assert_not_called()
+        self.assertContains(
+            response, f'<img class="card-img" src="{card["url"]}"')
+
+    def test_thumbnails_made_by_worker_process_show_on_cached_page(self):
+        """Worker's invalidation reaches pages cached by web process."""
+        self.new_post()
+        guest = Client()
+        response = guest.get(INDEX_URL)
+        self.assertNotContains(response, '<img class="card-img"')
+        run_workers_apart()
+        self.assertFalse(Job.objects.exists())
+        response = guest.get(
+            INDEX_URL, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '<img class="card-img"')
+
+    def test_replaced_image_drops_old_thumbnails(self):
+        """Edited post shows no thumbnails of its previous image."""
+        post = self.new_post()
+        Job.objects.all().delete()
+        Post.objects.filter(pk=post.pk).update(
+            thumbnails='{"card": ["old.png", 960, 339]}')
+        self.client.post(
+            reverse('post_edit', args=['bob', post.id]),
+            {'text': 'New image', 'image': image_upload('other.png')},
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnails, '')
+        job = Job.objects.get()
+        self.assertEqual(
+            json.loads(job.payload),
+            {'post_id': post.id, 'name': post.image.name})
+
+    @override_settings(THUMBNAIL_WORKERS=2)
+    def test_upload_only_queues_job_run_in_pool(self):
+        """Request queues thumbnails, job resizes in worker processes."""
+        pool = mock.Mock()
+        pool.submit.return_value.result.return_value = {}
+        with mock.patch('posts.thumbnails.executor', return_value=pool), \
+                mock.patch('posts.thumbnails.render_thumbnails') as render:
+            post = self.new_post()
+            self.assertTrue(
+                Job.objects.filter(name='make_thumbnails').exists())
+            pool.submit.assert_not_called()
+            run_pending()
+        render.assert_not_called()
+        pool.submit.assert_called_once_with(render, post.image.name)
+        self.assertFalse(Job.objects.exists())
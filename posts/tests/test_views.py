@@ -1,13 +1,28 @@
 from posts.tests.test_urls import PostsURLTests
+import datetime
+import hashlib
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django import forms
 
+from posts.caching import (CARD_VERSION_KEY, PAGE_LOCK_KEY,
+                           bump_page_generation, card_key)
 from posts.models import Group, Post
+from posts.pagination import (EPOCH, decode_cursor, encode_cursor,
+                              make_cursor, page_window)
 
 
 INDEX_URL = reverse('index')
+OUT_OF_RANGE_CURSORS = [
+    ('before', '999999999999999999999-1'),
+    ('before', '1-99999999999999999999999'),
+    ('after', '-99999999999999999999-1'),
+    ('before', '1--5'),
+]
 NEW_URL = reverse('new')
 
 
@@ -64,6 +79,7 @@ class PostsPagesTests(TestCase):
         cls.posts_count = cls.user_bob.posts.count()
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.auth_client_bob = Client()
         self.auth_client_bob.force_login(PostsPagesTests.user_bob)
@@ -169,3 +185,317 @@ class PostsPagesTests(TestCase):
         group_url = reverse('group', args=['slug_one'])
         response = self.auth_client_john.get(group_url)
         self.assertEqual(len(response.context['page']), group_items)
+
+    def test_homepage_keyset_pages_follow_feed_order(self):
+        """Cursor pages continue the feed where previous page ended."""
+        response = self.guest_client.get(INDEX_URL)
+        first_page = list(response.context['page'])
+        cursor = encode_cursor(first_page[-1])
+        response = self.guest_client.get(INDEX_URL, {'before': cursor})
+        second_page = list(response.context['page'])
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk')[10:20])
+        self.assertEqual(second_page, expected)
+        self.assertFalse(response.context['page'].has_next())
+        self.assertTrue(response.context['page'].has_previous())
+        response = self.guest_client.get(
+            INDEX_URL, {'after': encode_cursor(second_page[0])})
+        self.assertEqual(list(response.context['page']), first_page)
+        self.assertFalse(response.context['page'].has_previous())
+
+    @override_settings(POSTS_COUNT_ESTIMATE=True)
+    def test_estimated_count_clamps_to_last_page(self):
+        """Estimated count is bigger than real one because of id gaps,
+        out of range page number still shows real last page.
+        """
+        response = self.guest_client.get(INDEX_URL, {'page': 4})
+        page = response.context['page']
+        self.assertEqual(page.number, 2)
+        self.assertEqual(len(page), 7)
+        self.assertEqual(response.context['paginator'].count, 17)
+
+    def test_malformed_cursor_shows_first_page(self):
+        """Broken cursor falls back to ordinary numbered pagination."""
+        response = self.guest_client.get(INDEX_URL, {'before': 'abc'})
+        self.assertEqual(response.context['page'].number, 1)
+
+    def test_out_of_range_cursor_shows_first_page(self):
+        """Cursor beyond datetime or integer range is taken as broken."""
+        for name, cursor in OUT_OF_RANGE_CURSORS:
+            with self.subTest(cursor=cursor):
+                response = self.guest_client.get(INDEX_URL, {name: cursor})
+                self.assertEqual(response.context['page'].number, 1)
+
+    def test_cursor_before_epoch_is_decoded(self):
+        """Negative timestamp of cursor is not taken for a separator."""
+        moment = EPOCH - datetime.timedelta(days=1, microseconds=5)
+        self.assertEqual(decode_cursor(make_cursor(moment, 7)), (moment, 7))
+
+    @mock.patch('posts.pagination.CURSOR_FROM_PAGE', 1)
+    def test_deep_numbered_page_links_to_cursor_page(self):
+        """Next link of deep numbered page continues by cursor."""
+        response = self.guest_client.get(INDEX_URL, {'page': 1})
+        cursor = encode_cursor(list(response.context['page'])[-1])
+        self.assertContains(response, f'href="?before={cursor}"')
+        self.assertNotContains(response, 'href="?page=2">Следующая')
+        response = self.guest_client.get(INDEX_URL, {'before': cursor})
+        self.assertEqual(
+            list(response.context['page']),
+            list(Post.objects.order_by('-pub_date', '-pk')[10:20]))
+
+    def test_page_window(self):
+        """Page links keep ends and neighbours of current page only."""
+        cases = {
+            (1, 5): [1, 2, 3, 4, 5],
+            (1, 1000): [1, 2, 3, 4, None, 1000],
+            (500, 1000): [1, None, 497, 498, 499, 500, 501, 502, 503,
+                          None, 1000],
+            (998, 1000): [1, None, 995, 996, 997, 998, 999, 1000],
+        }
+        for (number, num_pages), expected in cases.items():
+            with self.subTest(number=number, num_pages=num_pages):
+                self.assertEqual(page_window(number, num_pages), expected)
+
+    def test_huge_feed_renders_windowed_page_links(self):
+        """Page with thousands of pages links to a handful of them."""
+        with mock.patch('posts.views.total_posts_count',
+                        return_value=100000):
+            response = self.guest_client.get(INDEX_URL)
+        content = response.content.decode()
+        self.assertIn('href="?page=10000"', content)
+        self.assertNotIn('href="?page=5000"', content)
+        self.assertLess(content.count('href="?page='), 10)
+        self.assertIn('name="page"', content)
+
+
+class PostsQueryCountTests(TestCase):
+    """Pages of posts.urls run fixed number of queries however many
+    posts are shown, so authors and groups never load one by one.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='bob')
+        cls.group = Group.objects.create(
+            title='Test group title',
+            description='About test group',
+            slug='slug_one',
+        )
+        for i in range(25):
+            cls.post = Post.objects.create(
+                text='Test post ' + str(i),
+                author=cls.user,
+                group=cls.group,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.auth_client = Client()
+        self.auth_client.force_login(PostsQueryCountTests.user)
+
+    def fetch(self, client, url):
+        """GET url, reading streamed body so its queries are counted."""
+        response = client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def test_pages_run_fixed_number_of_queries(self):
+        """Each URL runs recorded number of queries for guest and author.
+
+        Logged in client adds two queries: session and user. Counters
+        are warmed up by the first request, after that list pages take
+        number of posts without COUNT(*) and guests get them from page
+        cache without queries at all.
+        """
+        post_args = ['bob', PostsQueryCountTests.post.id]
+        url_queries = {
+            INDEX_URL: (0, 3),
+            INDEX_URL + '?page=2': (0, 3),
+            reverse('group', args=['slug_one']): (0, 4),
+            reverse('profile', args=['bob']): (0, 5),
+            reverse('post', args=post_args): (3, 5),
+            reverse('post_edit', args=post_args): (1, 4),
+            NEW_URL: (0, 3),
+            reverse('search') + '?q=post': (2, 4),
+            reverse('follow_index'): (0, 4),
+            reverse('api_feed'): (1, 1),
+            reverse('api_post', args=post_args[1:]): (1, 1),
+            reverse('api_group_feed', args=['slug_one']): (2, 2),
+            reverse('api_author_feed', args=['bob']): (2, 2),
+            reverse('feed_rss'): (0, 3),
+            reverse('feed_atom'): (0, 3),
+            reverse('group_feed_rss', args=['slug_one']): (0, 4),
+            reverse('group_feed_atom', args=['slug_one']): (0, 4),
+            reverse('author_feed_rss', args=['bob']): (0, 4),
+            reverse('author_feed_atom', args=['bob']): (0, 4),
+        }
+        for url, (guest_queries, auth_queries) in url_queries.items():
+            with self.subTest(url=url):
+                self.fetch(self.guest_client, url)
+                with self.assertNumQueries(guest_queries):
+                    self.fetch(self.guest_client, url)
+                with self.assertNumQueries(auth_queries):
+                    self.fetch(self.auth_client, url)
+
+    def test_staff_pages_run_fixed_number_of_queries(self):
+        """Export and slow query report don't load posts one by one."""
+        staff = get_user_model().objects.create(
+            username='staff', is_staff=True)
+        staff_client = Client()
+        staff_client.force_login(staff)
+        url_queries = {
+            reverse('export_posts'): 4,
+            reverse('export_posts') + '?format=csv': 4,
+            reverse('slow_queries'): 2,
+        }
+        for url, queries in url_queries.items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    self.fetch(staff_client, url)
+
+    def test_actions_run_fixed_number_of_queries(self):
+        """Comment, follow and unfollow write with fixed queries."""
+        get_user_model().objects.create(username='author')
+        post_args = ['bob', PostsQueryCountTests.post.id]
+        actions = [
+            (reverse('add_comment', args=post_args), {'text': 'Hi'}, 6),
+            # First follower also seeds stats row of the author.
+            (reverse('profile_follow', args=['author']), {}, 20),
+            (reverse('profile_unfollow', args=['author']), {}, 10),
+        ]
+        for url, data, queries in actions:
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    self.auth_client.post(url, data)
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='bob')
+        cls.post = Post.objects.create(
+            text='Cached card text',
+            author=cls.user,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_card_is_rendered_once_per_version(self):
+        """Second page render takes card from cache, edit replaces it."""
+        self.guest_client.get(INDEX_URL)
+        key = card_key(PostCardCacheTests.post.id, False, 'index')
+        self.assertIn('Cached card text', cache.get(key))
+        post = Post.objects.get(id=PostCardCacheTests.post.id)
+        post.text = 'Edited card text'
+        post.save()
+        self.assertIsNone(cache.get(card_key(post.id, False, 'index')))
+        response = self.guest_client.get(INDEX_URL)
+        self.assertContains(response, 'Edited card text')
+        self.assertNotContains(response, 'Cached card text')
+
+    def test_evicted_version_does_not_bring_back_old_card(self):
+        """Version lost from cache starts above every version used."""
+        post = PostCardCacheTests.post
+        reader = Client()
+        reader.force_login(
+            get_user_model().objects.create(username='reader'))
+        reader.get(INDEX_URL)
+        post.text = 'Edited card text'
+        post.save()
+        reader.get(INDEX_URL)
+        cache.delete(CARD_VERSION_KEY.format(post.id))
+        response = reader.get(INDEX_URL)
+        self.assertContains(response, 'Edited card text')
+        self.assertNotContains(response, 'Cached card text')
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='bob')
+        cls.post = Post.objects.create(text='First post', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_new_post_bumps_page_generation(self):
+        """Cached page is served until new post makes it stale."""
+        self.guest_client.get(INDEX_URL)
+        Post.objects.filter(pk=AnonymousPageCacheTests.post.pk).update(
+            text='Changed behind signals')
+        response = self.guest_client.get(INDEX_URL)
+        self.assertIsNone(response.context)
+        self.assertContains(response, 'First post')
+        Post.objects.create(text='Second post', author=self.user)
+        response = self.guest_client.get(INDEX_URL)
+        self.assertContains(response, 'Second post')
+
+    def test_stale_page_served_while_other_request_renders(self):
+        """Only lock owner renders expired page, others get stale copy."""
+        self.guest_client.get(INDEX_URL)
+        bump_page_generation('index')
+        Post.objects.create(text='Second post', author=self.user)
+        digest = hashlib.md5(INDEX_URL.encode()).hexdigest()
+        cache.set(PAGE_LOCK_KEY.format(digest), 1)
+        response = self.guest_client.get(INDEX_URL)
+        self.assertNotContains(response, 'Second post')
+        cache.delete(PAGE_LOCK_KEY.format(digest))
+        response = self.guest_client.get(INDEX_URL)
+        self.assertContains(response, 'Second post')
+
+    def test_authorized_user_page_not_cached(self):
+        """Logged in user always gets freshly rendered page."""
+        auth_client = Client()
+        auth_client.force_login(AnonymousPageCacheTests.user)
+        auth_client.get(INDEX_URL)
+        response = auth_client.get(INDEX_URL)
+        self.assertIsNotNone(response.context)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='bob')
+        cls.post = Post.objects.create(text='First post', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_unchanged_pages_answer_not_modified(self):
+        """Pages answer 304 to matching ETag until scope changes."""
+        urls = (
+            INDEX_URL,
+            reverse('profile', args=['bob']),
+            reverse('post', args=['bob', ConditionalGetTests.post.id]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                post = Post.objects.get(id=ConditionalGetTests.post.id)
+                post.save()
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_differs_for_pages_and_users(self):
+        """Other page number and logged in user get own validators."""
+        auth_client = Client()
+        auth_client.force_login(ConditionalGetTests.user)
+        guest_etag = self.guest_client.get(INDEX_URL)['ETag']
+        self.assertNotEqual(
+            guest_etag, self.guest_client.get(INDEX_URL + '?page=2')['ETag'])
+        response = auth_client.get(INDEX_URL)
+        self.assertNotEqual(guest_etag, response['ETag'])
+        self.assertFalse(response.has_header('Last-Modified'))
@@ -0,0 +1,117 @@
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.files.storage import default_storage
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import KVStoreBase
+
+_executor = None
+
+
+class MemoryKVStore(KVStoreBase):
+    """Key value store of worker process, results are sent to parent.
+
+    Workers do not touch the database; the parent writes what they made
+    to the shared store. Module is imported by workers before Django is
+    set up, so models are imported where they are used.
+    """
+    def __init__(self):
+        super().__init__()
+        self.data = {}
+
+    def _get_raw(self, key):
+        return self.data.get(key)
+
+    def _set_raw(self, key, value):
+        self.data[key] = value
+
+    def _delete_raw(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def _find_keys_raw(self, prefix):
+        return [key for key in self.data if key.startswith(prefix)]
+
+
+def init_worker():
+    django.setup()
+    default.kvstore = MemoryKVStore()
+
+
+def executor():
+    """Return process pool shared by jobs of this process."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker,
+        )
+    return _executor
+
+
+def render_thumbnails(name):
+    """Make thumbnails of image in every POST_THUMBNAIL_SIZES size.
+
+    Return {size: (source, thumbnail)} of serialized sorl image files.
+    """
+    made = {}
+    for size, (geometry, options) in settings.POST_THUMBNAIL_SIZES.items():
+        thumbnail = get_thumbnail(name, geometry, **options)
+        source = default.kvstore.get(ImageFile(name))
+        made[size] = (source.serialize(), thumbnail.serialize())
+    return made
+
+
+def store_thumbnails(post_id, name, made):
+    """Save thumbnails made for image name unless post image has changed.
+
+    Sorl key value store gets the same entries as if thumbnails were
+    made on render, post gets names and sizes so cards show them
+    without any lookups.
+    """
+    from .models import Post
+
+    stored = {}
+    for size, (source, thumbnail) in made.items():
+        source = deserialize_image_file(source)
+        thumbnail = deserialize_image_file(thumbnail)
+        default.kvstore.set(source)
+        default.kvstore.set(thumbnail, source)
+        stored[size] = [thumbnail.name, thumbnail.width, thumbnail.height]
+    post = Post.objects.filter(pk=post_id, image=name).first()
+    if post is not None:
+        post.thumbnails = json.dumps(stored)
+        post.save(update_fields=['thumbnails'])
+
+
+def stored_thumbnail(post, size):
+    """Return url, width and height of post thumbnail or None."""
+    if not post.thumbnails:
+        return None
+    thumbnail = json.loads(post.thumbnails).get(size)
+    if thumbnail is None:
+        return None
+    name, width, height = thumbnail
+    return {
+        'url': default_storage.url(name),
+        'width': width,
+        'height': height,
+    }
+
+
+def make_thumbnails(post_id, name):
+    """Make and store thumbnails of post image, run by background job.
+
+    Resizing runs in THUMBNAIL_WORKERS processes so job worker threads
+    are not held by the GIL.
+    """
+    if settings.THUMBNAIL_WORKERS:
+        made = executor().submit(render_thumbnails, name).result()
+    else:
+        made = render_thumbnails(name)
+    store_thumbnails(post_id, name, made)
@@ -0,0 +1,112 @@
+from django.conf import settings
+
+from .models import AuthorStats, Follow, Post, TimelineEntry
+from .pagination import POSTS_PER_PAGE, KeysetPage, keyset_queryset
+
+FANOUT_BATCH_SIZE = 1000
+
+
+def is_prolific(author_id):
+    """Authors with FEED_FANOUT_LIMIT followers are pulled, not pushed."""
+    return AuthorStats.objects.filter(
+        author_id=author_id,
+        followers_count__gte=settings.FEED_FANOUT_LIMIT,
+    ).exists()
+
+
+def fan_out(post):
+    """Copy new post into feeds of author followers.
+
+    Posts of prolific authors are skipped: writing them into every
+    follower feed costs more than reading them when feed is shown.
+    """
+    if is_prolific(post.author_id):
+        return 0
+    followers = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    created = 0
+    batch = []
+    for user_id in followers.iterator():
+        batch.append(TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        ))
+        if len(batch) == FANOUT_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            created += len(batch)
+            batch = []
+    TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+    return created + len(batch)
+
+
+def backfill(user_id, author_id):
+    """Put recent posts of newly followed author into user feed."""
+    if is_prolific(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date').values_list('pk', 'pub_date')[:settings.FEED_BACKFILL]
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post_id=pk, author_id=author_id,
+                       pub_date=pub_date)
+         for pk, pub_date in posts),
+        ignore_conflicts=True,
+    )
+
+
+def backfill_followers(author_id):
+    """Put recent posts of author into feeds of all author followers."""
+    if is_prolific(author_id):
+        return
+    posts = list(Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date').values_list('pk', 'pub_date')[:settings.FEED_BACKFILL])
+    followers = Follow.objects.filter(
+        author_id=author_id).values_list('user_id', flat=True)
+    batch = []
+    for user_id in followers.iterator():
+        batch.extend(
+            TimelineEntry(user_id=user_id, post_id=pk, author_id=author_id,
+                          pub_date=pub_date)
+            for pk, pub_date in posts)
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def drop_author(user_id, author_id):
+    """Remove posts of unfollowed author from user feed."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, author_id=author_id).delete()
+
+
+def feed_page(user, before=None, after=None, per_page=POSTS_PER_PAGE):
+    """Return KeysetPage of posts of authors the user follows.
+
+    Feed entries written on post creation are merged with posts pulled
+    from prolific authors, both read as index range scans bounded by
+    the page size.
+    """
+    entries = keyset_queryset(
+        TimelineEntry.objects.filter(user=user), before, after,
+        tiebreak='post_id',
+    ).values_list('pub_date', 'post_id')[:per_page + 1]
+    rows = set(entries)
+    pulled = Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gte=settings.FEED_FANOUT_LIMIT,
+    ).values_list('author_id', flat=True)
+    pulled = list(pulled)
+    if pulled:
+        rows.update(keyset_queryset(
+            Post.objects.filter(author_id__in=pulled), before, after,
+        ).values_list('pub_date', 'pk')[:per_page + 1])
+    rows = sorted(rows, reverse=after is None)
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    posts = Post.objects.with_related().in_bulk([pk for _, pk in rows])
+    object_list = [posts[pk] for _, pk in rows if pk in posts]
+    if after is not None:
+        return KeysetPage(object_list[::-1], True, has_more)
+    return KeysetPage(object_list, has_more, before is not None)
@@ -1,17 +1,71 @@
 from django.urls import path
 
-from . import views
+from . import api, feeds, views
 
 
 urlpatterns = [
     path("new/", views.new_post, name="new"),
+    path("search/", views.search, name="search"),
+    path("export/posts/", views.export_posts, name="export_posts"),
+    path("staff/slow-queries/", views.slow_query_report,
+         name="slow_queries"),
+    path("api/v1/posts/", api.feed, name="api_feed"),
+    path("api/v1/posts/<int:post_id>/", api.post_detail, name="api_post"),
+    path(
+        "api/v1/groups/<slug:slug>/posts/",
+        api.group_feed,
+        name="api_group_feed",
+    ),
+    path(
+        "api/v1/authors/<str:username>/posts/",
+        api.author_feed,
+        name="api_author_feed",
+    ),
+    path("feeds/rss/", feeds.posts_rss, name="feed_rss"),
+    path("feeds/atom/", feeds.posts_atom, name="feed_atom"),
+    path(
+        "feeds/group/<slug:slug>/rss/",
+        feeds.group_rss,
+        name="group_feed_rss",
+    ),
+    path(
+        "feeds/group/<slug:slug>/atom/",
+        feeds.group_atom,
+        name="group_feed_atom",
+    ),
+    path(
+        "feeds/author/<str:username>/rss/",
+        feeds.author_rss,
+        name="author_feed_rss",
+    ),
+    path(
+        "feeds/author/<str:username>/atom/",
+        feeds.author_atom,
+        name="author_feed_atom",
+    ),
     path("group/<slug:slug>/", views.group_posts, name="group"),
     path("", views.index, name="index"),
+    path("follow/", views.follow_index, name="follow_index"),
     path('<str:username>/', views.profile, name='profile'),
+    path(
+        '<str:username>/follow/',
+        views.profile_follow,
+        name='profile_follow',
+    ),
+    path(
+        '<str:username>/unfollow/',
+        views.profile_unfollow,
+        name='profile_unfollow',
+    ),
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
     path(
         '<str:username>/<int:post_id>/edit/',
         views.post_edit,
         name='post_edit',
-    )
+    ),
+    path(
+        '<str:username>/<int:post_id>/comment/',
+        views.add_comment,
+        name='add_comment',
+    ),
 ]
@@ -1,39 +1,83 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_POST
 
-from .forms import PostForm
-from .models import Group, Post, User
+from .caching import cache_anonymous_page, conditional_page
+from .counters import author_stats, group_posts_count, total_posts_count
+from .export import WRITERS, export_stream
+from .forms import CommentForm, PostForm
+from .models import Follow, Group, Post, User
+from .pagination import (POSTS_PER_PAGE, KeysetPage, decode_cursor,
+                         keyset_page, paginate)
+from .search import (decode_search_cursor, encode_search_cursor,
+                     search_post_ids)
+from .slow_queries import aggregates
+from .timeline import feed_page
 
 
+@conditional_page('index')
+@cache_anonymous_page('index')
 def index(request):
     """Return 10 posts per page beginning from last."""
-    post_list = Post.objects.select_related('group')
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    context = {"page": page, "paginator": paginator}
+    post_list = Post.objects.with_related()
+    context = paginate(request, post_list, count=total_posts_count())
     return render(request, "index.html", context)
 
 
+@conditional_page('group:{slug}')
+@cache_anonymous_page('group:{slug}')
 def group_posts(request, slug):
     """Return 10 posts per page in group beginning from last."""
     group = get_object_or_404(Group, slug=slug)
-    group_post_list = group.posts.all()
-    paginator = Paginator(group_post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    group_post_list = group.posts.with_related()
     context = {
         "group": group,
-        "page": page,
-        "paginator": paginator,
+        **paginate(request, group_post_list,
+                   count=group_posts_count(group)),
     }
     return render(request, "group.html", context)
 
 
+def search(request):
+    """Return posts matching query, most relevant first."""
+    query = request.GET.get('q', '')
+    group = author = None
+    if request.GET.get('group'):
+        group = get_object_or_404(Group, slug=request.GET['group'])
+    if request.GET.get('author'):
+        author = get_object_or_404(User, username=request.GET['author'])
+    after = decode_search_cursor(request.GET.get('after'))
+    rows = search_post_ids(
+        query, group, author, after, limit=POSTS_PER_PAGE + 1)
+    has_next = len(rows) > POSTS_PER_PAGE
+    rows = rows[:POSTS_PER_PAGE]
+    posts = Post.objects.with_related().in_bulk(
+        [pk for pk, _ in rows])
+    page = KeysetPage(
+        [posts[pk] for pk, _ in rows if pk in posts],
+        has_next,
+        after is not None,
+    )
+    next_query = None
+    if has_next:
+        params = request.GET.copy()
+        params['after'] = encode_search_cursor(rows[-1][1], rows[-1][0])
+        next_query = params.urlencode()
+    context = {
+        "page": page,
+        "query": query,
+        "group": group,
+        "author": author,
+        "next_query": next_query,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def new_post(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if request.method == 'POST' and form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
@@ -43,39 +87,108 @@ def new_post(request):
     return render(request, 'posts/new.html', context)
 
 
-def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    author_posts_list = author.posts.all()
-    paginator = Paginator(author_posts_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    posts_count = author.posts.count()
-    context = {
-        "page": page,
+def author_context(request, author):
+    """Return counters of author and whether current user follows them."""
+    stats = author_stats(author)
+    following = (
+        request.user.is_authenticated
+        and request.user != author
+        and Follow.objects.filter(user=request.user, author=author).exists()
+    )
+    return {
         "author": author,
-        "paginator": paginator,
-        "posts_count": posts_count,
+        "posts_count": stats.posts_count,
+        "followers_count": stats.followers_count,
+        "following_count": stats.following_count,
+        "following": following,
     }
+
+
+@conditional_page('profile:{username}')
+@cache_anonymous_page('profile:{username}')
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    author_posts_list = author.posts.with_related()
+    context = author_context(request, author)
+    context.update(paginate(
+        request, author_posts_list, count=context["posts_count"]))
     return render(request, 'profile.html', context)
 
 
+@conditional_page('profile:{username}')
 def post_view(request, username, post_id):
-    author = get_object_or_404(User, username=username)
-    post = get_object_or_404(Post, author__username=username, id=post_id)
-    posts_count = author.posts.count()
-    context = {
-        "post": post,
-        "posts_count": posts_count,
-        "author": author,
-    }
+    post = get_object_or_404(
+        Post.objects.with_related(),
+        author__username=username,
+        id=post_id,
+    )
+    context = author_context(request, post.author)
+    context["post"] = post
+    context["comments"] = keyset_page(
+        post.comments.select_related('author'),
+        before=decode_cursor(request.GET.get('before')),
+        after=decode_cursor(request.GET.get('after')),
+        field='created',
+    )
+    context["form"] = CommentForm()
     return render(request, 'post.html', context)
 
 
+@login_required
+@require_POST
+def add_comment(request, username, post_id):
+    post = get_object_or_404(
+        Post, author__username=username, id=post_id)
+    form = CommentForm(request.POST)
+    if form.is_valid():
+        comment = form.save(commit=False)
+        comment.post = post
+        comment.author = request.user
+        comment.save()
+    return redirect('post', username=username, post_id=post_id)
+
+
+@login_required
+def follow_index(request):
+    """Return posts of followed authors, newest first, by cursor pages."""
+    page = feed_page(
+        request.user,
+        before=decode_cursor(request.GET.get('before')),
+        after=decode_cursor(request.GET.get('after')),
+    )
+    return render(request, 'follow.html', {"page": page, "paginator": None})
+
+
+@login_required
+@require_POST
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('profile', username=username)
+
+
+@login_required
+@require_POST
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    Follow.objects.filter(user=request.user, author=author).delete()
+    return redirect('profile', username=username)
+
+
 def post_edit(request, username, post_id):
-    post = get_object_or_404(Post, author__username=username, id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author'),
+        author__username=username,
+        id=post_id,
+    )
     if request.user != post.author:
         return redirect('post', username=username, post_id=post_id)
-    form = PostForm(data=request.POST or None, instance=post)
+    form = PostForm(
+        data=request.POST or None,
+        files=request.FILES or None,
+        instance=post,
+    )
     if request.method == 'POST' and form.is_valid():
         form.save()
         return redirect('post', username=username, post_id=post_id)
@@ -85,3 +198,42 @@ def post_edit(request, username, post_id):
         "post": post,
     }
     return render(request, 'posts/new.html', context)
+
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+@staff_member_required
+def export_posts(request):
+    """Stream all posts as csv or jsonl file, gzipped with ?gzip=1."""
+    file_format = request.GET.get('format', 'jsonl')
+    if file_format not in WRITERS:
+        return HttpResponseBadRequest('Unknown export format.')
+    compress = bool(request.GET.get('gzip'))
+    filename = f'posts.{file_format}'
+    content_type = EXPORT_CONTENT_TYPES[file_format]
+    if compress:
+        filename += '.gz'
+        content_type = 'application/gzip'
+    response = StreamingHttpResponse(
+        export_stream(file_format, compress),
+        content_type=content_type,
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@staff_member_required
+def slow_query_report(request):
+    """Show slow query fingerprints ordered by total, count or p95 time."""
+    order = request.GET.get('order', 'total_ms')
+    if order not in ('total_ms', 'count', 'p95_ms'):
+        order = 'total_ms'
+    context = {
+        "queries": aggregates(order),
+        "order": order,
+    }
+    return render(request, 'posts/slow_queries.html', context)
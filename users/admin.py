@@ -1,3 +1,13 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import OutboxMessage
+
+
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ("pk", "subject", "recipients", "status", "attempts",
+                    "send_at")
+    search_fields = ("subject", "recipients")
+    list_filter = ("status",)
+    exclude = ("mime",)
+
+admin.site.register(OutboxMessage, OutboxMessageAdmin)
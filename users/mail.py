@@ -0,0 +1,139 @@
+import datetime
+import email
+import logging
+import traceback
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.message import MIMEMixin
+from django.db import transaction
+from django.utils import timezone
+
+from posts.jobs import backoff, enqueue, task
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+DRAIN_JOB = 'drain_outbox'
+
+
+class StoredMIME(MIMEMixin, email.message.Message):
+    """MIME message parsed back from outbox, serialized like Django's."""
+
+
+class StoredEmail(EmailMessage):
+    """Message of outbox row, sent with its stored MIME as it is."""
+    def __init__(self, row):
+        super().__init__(
+            subject=row.subject,
+            from_email=row.from_email,
+            to=row.recipients.split('\n'),
+        )
+        self.mime = bytes(row.mime)
+
+    def message(self):
+        return email.message_from_bytes(self.mime, _class=StoredMIME)
+
+
+class OutboxBackend(BaseEmailBackend):
+    """Email backend writing messages to the outbox and returning at once.
+
+    Messages are kept as serialized MIME with envelope sender and
+    recipients and sent later by drain_outbox job through
+    OUTBOX_EMAIL_BACKEND, so requests do not wait for mail transport.
+    """
+    def send_messages(self, email_messages):
+        rows = []
+        for message in email_messages:
+            if not message.recipients():
+                continue
+            rows.append(OutboxMessage(
+                subject=message.subject[:255],
+                from_email=message.from_email,
+                recipients='\n'.join(message.recipients()),
+                mime=message.message().as_bytes(),
+            ))
+        if rows:
+            with transaction.atomic():
+                OutboxMessage.objects.bulk_create(rows)
+                schedule_drain()
+        return len(rows)
+
+
+def schedule_drain(delay=0):
+    enqueue(DRAIN_JOB, key=DRAIN_JOB, delay=delay)
+
+
+def claim_messages(limit):
+    """Take up to limit due messages, oldest first.
+
+    Taken messages are put off by OUTBOX_LOCK_TIMEOUT, so another drain
+    does not send them too and they come back if this one is lost.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(OutboxMessage.objects.filter(
+            status=OutboxMessage.PENDING, send_at__lte=now,
+        ).order_by('send_at', 'pk').values_list('pk', flat=True)[:limit])
+        OutboxMessage.objects.filter(pk__in=ids).update(
+            send_at=now + datetime.timedelta(
+                seconds=settings.OUTBOX_LOCK_TIMEOUT))
+    return list(OutboxMessage.objects.filter(pk__in=ids).order_by('pk'))
+
+
+def fail_message(row, error):
+    row.attempts += 1
+    row.last_error = error
+    if row.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        row.status = OutboxMessage.FAILED
+    else:
+        row.send_at = timezone.now() + datetime.timedelta(
+            seconds=backoff(row.attempts))
+    row.save(update_fields=['attempts', 'last_error', 'status', 'send_at'])
+
+
+def send_batch(connection, rows):
+    """Send messages of rows over open connection, return number sent."""
+    sent = []
+    for row in rows:
+        try:
+            connection.send_messages([StoredEmail(row)])
+        except Exception:
+            logger.exception('Email %s was not sent', row.pk)
+            fail_message(row, traceback.format_exc())
+            # Next message opens a new connection instead of broken one.
+            connection.close()
+        else:
+            sent.append(row.pk)
+    OutboxMessage.objects.filter(pk__in=sent).delete()
+    return len(sent)
+
+
+@task(DRAIN_JOB)
+def drain_outbox():
+    """Send due messages in batches of OUTBOX_BATCH_SIZE, return count.
+
+    All batches go over one connection of OUTBOX_EMAIL_BACKEND. When
+    failed messages wait for retry, the next drain is queued for the
+    earliest of them.
+    """
+    sent = 0
+    connection = get_connection(settings.OUTBOX_EMAIL_BACKEND)
+    connection.open()
+    try:
+        while True:
+            rows = claim_messages(settings.OUTBOX_BATCH_SIZE)
+            if not rows:
+                break
+            sent += send_batch(connection, rows)
+    finally:
+        connection.close()
+    retry_at = OutboxMessage.objects.filter(
+        status=OutboxMessage.PENDING,
+    ).order_by('send_at').values_list('send_at', flat=True).first()
+    if retry_at is not None:
+        delay = (retry_at - timezone.now()).total_seconds()
+        schedule_drain(max(delay, 0))
+    return sent
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.6 on 2026-10-18 05:57
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255, verbose_name='тема')),
+                ('from_email', models.CharField(max_length=254, verbose_name='отправитель')),
+                ('recipients', models.TextField(verbose_name='получатели')),
+                ('mime', models.BinaryField()),
+                ('status', models.CharField(choices=[('pending', 'ожидает'), ('failed', 'не отправлено')], default='pending', max_length=10, verbose_name='состояние')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='попыток')),
+                ('send_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='отправить после')),
+                ('last_error', models.TextField(blank=True, verbose_name='последняя ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='добавлено')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='outboxmessage',
+            index=models.Index(fields=['status', 'send_at'], name='outbox_status_send_at_idx'),
+        ),
+    ]
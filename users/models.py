@@ -1,3 +1,41 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class OutboxMessage(models.Model):
+    """Email waiting in the outbox to be sent, see users.mail."""
+    PENDING = "pending"
+    FAILED = "failed"
+    STATUSES = (
+        (PENDING, "ожидает"),
+        (FAILED, "не отправлено"),
+    )
+
+    subject = models.CharField("тема", max_length=255)
+    from_email = models.CharField("отправитель", max_length=254)
+    # Envelope recipients one per line, Bcc included.
+    recipients = models.TextField("получатели")
+    # Serialized MIME message with alternatives and attachments.
+    mime = models.BinaryField()
+    status = models.CharField(
+        "состояние",
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+    )
+    attempts = models.PositiveIntegerField("попыток", default=0)
+    send_at = models.DateTimeField("отправить после", default=timezone.now)
+    last_error = models.TextField("последняя ошибка", blank=True)
+    created = models.DateTimeField("добавлено", auto_now_add=True)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=["status", "send_at"],
+                name="outbox_status_send_at_idx",
+            ),
+        )
+
+    def __str__(self):
+        recipients = ", ".join(self.recipients.splitlines())
+        return f"{self.subject} -> {recipients}"
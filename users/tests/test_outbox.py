@@ -0,0 +1,113 @@
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives, send_mail
+from django.core.mail.backends import locmem
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.jobs import run_pending
+from posts.models import Job
+
+from users.mail import DRAIN_JOB
+from users.models import OutboxMessage
+
+
+class StandInBackend(locmem.EmailBackend):
+    """Mail transport of tests: counts connections, rejects broken@."""
+    opened = 0
+
+    def open(self):
+        StandInBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            if 'broken@example.com' in message.recipients():
+                raise ConnectionError('Recipient refused')
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='users.mail.OutboxBackend',
+    OUTBOX_EMAIL_BACKEND='users.tests.test_outbox.StandInBackend',
+    OUTBOX_BATCH_SIZE=2,
+    OUTBOX_MAX_ATTEMPTS=2,
+)
+class OutboxTests(TestCase):
+    def setUp(self):
+        StandInBackend.opened = 0
+
+    def send(self, recipient='reader@example.com'):
+        send_mail('Тема', 'Текст', 'yatube@example.com', [recipient])
+
+    def test_password_reset_only_writes_outbox(self):
+        """Reset request stores message, drain job sends it."""
+        get_user_model().objects.create_user(
+            'reader', 'reader@example.com', 'secret-password')
+        response = self.client.post(
+            reverse('password_reset'), {'email': 'reader@example.com'})
+        self.assertRedirects(response, reverse('password_reset_done'))
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(OutboxMessage.objects.get().recipients,
+                         'reader@example.com')
+        self.assertEqual(Job.objects.get().name, DRAIN_JOB)
+        run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        text = mail.outbox[0].message().get_payload(decode=True).decode()
+        self.assertIn('reader', text)
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_message_is_stored_and_sent_as_mime(self):
+        """Alternatives, attachments and Bcc survive the outbox."""
+        message = EmailMultiAlternatives(
+            'Тема', 'Текст', 'yatube@example.com', ['reader@example.com'],
+            bcc=['hidden@example.com'])
+        message.attach_alternative('<p>Текст</p>', 'text/html')
+        message.attach('report.txt', 'Отчёт', 'text/plain')
+        message.send()
+        row = OutboxMessage.objects.get()
+        self.assertEqual(row.recipients,
+                         'reader@example.com\nhidden@example.com')
+        self.assertIn(b'Subject: ', bytes(row.mime))
+        run_pending()
+        sent, = mail.outbox
+        self.assertEqual(
+            sent.recipients(), ['reader@example.com', 'hidden@example.com'])
+        mime = sent.message()
+        self.assertNotIn('Bcc', mime)
+        self.assertEqual(
+            [part.get_content_type() for part in mime.walk()],
+            ['multipart/mixed', 'multipart/alternative', 'text/plain',
+             'text/html', 'text/plain'])
+        self.assertEqual(mime.get_payload()[1].get_filename(), 'report.txt')
+        self.assertIn(b'\r\nSubject: ', mime.as_bytes(linesep='\r\n'))
+
+    def test_batches_share_one_connection(self):
+        """Outbox is drained in batches over a single connection."""
+        for _ in range(5):
+            self.send()
+        self.assertEqual(Job.objects.count(), 1)
+        run_pending()
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(StandInBackend.opened, 1)
+
+    def test_failed_message_is_retried_then_kept(self):
+        """Refused message waits for retry, others are sent."""
+        self.send('broken@example.com')
+        self.send()
+        with self.assertLogs('users.mail', 'ERROR'):
+            run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(
+            (message.status, message.attempts), (OutboxMessage.PENDING, 1))
+        retry = Job.objects.get(name=DRAIN_JOB)
+        self.assertGreater(retry.run_at, message.created)
+        Job.objects.update(run_at=message.created)
+        OutboxMessage.objects.update(send_at=message.created)
+        with self.assertLogs('users.mail', 'ERROR'):
+            run_pending()
+        message.refresh_from_db()
+        self.assertEqual(
+            (message.status, message.attempts), (OutboxMessage.FAILED, 2))
+        self.assertFalse(Job.objects.exists())
@@ -49,6 +49,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'posts.middleware.ServerTimingMiddleware',
+    'posts.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,6 +58,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'posts.middleware.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -78,19 +81,152 @@ TEMPLATES = [
     },
 ]
 
+# Without DEBUG every template is compiled once per worker, all of them
+# at worker start, see posts.template_loaders.
+if not DEBUG:
+    del TEMPLATES[0]['APP_DIRS']
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# yatube.sqlite3 applies PRAGMAS to every connection, starts
+# transactions in TRANSACTION_MODE and checks kept connections before
+# reuse when HEALTH_CHECKS is on.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yatube.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 600,
+        'HEALTH_CHECKS': True,
+        'TRANSACTION_MODE': 'IMMEDIATE',
+        'PRAGMAS': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 5000,
+            'cache_size': -64000,
+            'mmap_size': 268435456,
+            'temp_store': 'MEMORY',
+        },
+    },
+    # Read-only copy of default database made by sync_replica command.
+    'replica': {
+        'ENGINE': 'yatube.sqlite3',
+        'NAME': 'file:{}?mode=ro'.format(
+            os.path.join(BASE_DIR, 'db.replica.sqlite3')),
+        'OPTIONS': {'uri': True},
+        'CONN_MAX_AGE': 600,
+        'HEALTH_CHECKS': True,
+        'REOPEN_ON_REPLACE': True,
+        'PRAGMAS': {
+            'query_only': 1,
+            'cache_size': -64000,
+            'mmap_size': 268435456,
+            'temp_store': 'MEMORY',
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
+}
+
+DATABASE_ROUTERS = ['posts.replicas.ReplicaRouter']
+
+# Public views whose GET requests read posts from REPLICA_DATABASE.
+# Visitor who has sent a form reads from default database for
+# REPLICA_PIN_SECONDS, longer than replica sync interval.
+REPLICA_DATABASE = 'replica'
+
+REPLICA_APPS = ['posts']
+
+REPLICA_VIEWS = ['index', 'group', 'profile', 'post']
+
+REPLICA_PIN_COOKIE = 'read_primary'
+
+REPLICA_PIN_SECONDS = 30
+
+REPLICA_SYNC_INTERVAL = 5
+
+# Replica not synced for this many seconds is taken as abandoned and
+# reads go to default database.
+REPLICA_MAX_AGE = REPLICA_SYNC_INTERVAL * 3
+
+# Posts of authors with this many followers are not copied into every
+# follower feed on creation but read when feed is shown. Number of
+# recent posts put into feed when author gets followed.
+FEED_FANOUT_LIMIT = 10000
+
+FEED_BACKFILL = 50
+
+# Background jobs run by "manage.py run_workers" threads. Failed job is
+# retried after JOB_BACKOFF seconds doubled on every attempt up to
+# JOB_BACKOFF_MAX; job running longer than JOB_LOCK_TIMEOUT is taken
+# as lost with its worker and queued again.
+JOB_WORKERS = 4
+
+JOB_POLL_INTERVAL = 1
+
+JOB_MAX_ATTEMPTS = 5
+
+JOB_BACKOFF = 10
+
+JOB_BACKOFF_MAX = 3600
+
+JOB_LOCK_TIMEOUT = 600
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+
+# Web server and run_workers processes share cached cards, pages and
+# their versions, so the cache must not live inside one process.
+# add() and incr() of file cache are not atomic between processes:
+# two of them may both take the page regeneration lock and render the
+# page twice, or lose one of two bumps made at the same moment. Test
+# runs use a temporary directory instead, see yatube.test_runner.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
     }
 }
 
+TEST_RUNNER = 'yatube.test_runner.DiscoverRunner'
+
+# Seconds the total number of posts for paginator is kept in cache;
+# estimated count comes from the largest id and skips COUNT(*) at all.
+POSTS_COUNT_TIMEOUT = 60
+
+POSTS_COUNT_ESTIMATE = False
+
+# Seconds anonymous visitors get cached index, group and profile pages
+# before one of them renders the page again.
+PAGE_CACHE_TIMEOUT = 30
+
+# Report SQL, template and view time of requests in Server-Timing header
+# and "posts.timing" log.
+SERVER_TIMING = False
+
+# Milliseconds after which SQL statement is written to SLOW_QUERY_LOG,
+# None turns the slow query log off. Share of slow statements logged
+# with their EXPLAIN QUERY PLAN.
+SLOW_QUERY_THRESHOLD = None
+
+SLOW_QUERY_EXPLAIN_RATE = 0.1
+
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, "slow_queries.jsonl")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -132,6 +268,20 @@ STATIC_URL = '/static/'
 
 STATIC_ROOT = os.path.join(BASE_DIR, "static")
 
+MEDIA_URL = '/media/'
+
+MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+
+# Thumbnails are made by a background job in THUMBNAIL_WORKERS
+# processes, 0 makes them in the job worker itself. Sizes are sorl
+# geometry and options by name used in templates.
+THUMBNAIL_WORKERS = 2
+
+POST_THUMBNAIL_SIZES = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+    'square': ('300x300', {'crop': 'center'}),
+}
+
 # Login
 
 LOGIN_URL = "/auth/login/"
@@ -139,7 +289,18 @@ LOGIN_REDIRECT_URL = "index"
 # LOGOUT_REDIRECT_URL = "index" 
 
 
-#  подключаем движок filebased.EmailBackend
-EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
+# письма складываются в очередь и отправляются фоновой задачей
+EMAIL_BACKEND = "users.mail.OutboxBackend"
+#  подключаем движок filebased.EmailBackend для отправки из очереди
+OUTBOX_EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 # указываем директорию, в которую будут складываться файлы писем
-EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
\ No newline at end of file
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
+
+# Messages sent over one connection per batch. Message failed
+# OUTBOX_MAX_ATTEMPTS times is kept in outbox as not sent; message taken
+# by lost drain is sent again after OUTBOX_LOCK_TIMEOUT seconds.
+OUTBOX_BATCH_SIZE = 50
+
+OUTBOX_MAX_ATTEMPTS = 5
+
+OUTBOX_LOCK_TIMEOUT = 300
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""SQLite backend tuned for one web server with many readers.
+
+Every new connection gets PRAGMAS of database settings (WAL journal by
+default), transactions may start with BEGIN IMMEDIATE so writers wait
+for the lock in busy handler instead of failing on upgrade, and
+connections kept with CONN_MAX_AGE are checked before reuse when
+HEALTH_CHECKS is on. With REOPEN_ON_REPLACE kept connection is closed
+once its database file is replaced, as synced replica copies are.
+"""
+import os
+
+from django.db.backends.sqlite3 import base
+
+# Applied in this order, journal_mode goes first as it may need to
+# create WAL files before other settings take effect.
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+def apply_pragmas(connection, pragmas):
+    """Run PRAGMA name = value for every item on DB-API connection."""
+    for name, value in pragmas.items():
+        connection.execute(f'PRAGMA {name} = {value}').fetchall()
+
+
+def database_path(name):
+    """Return file path of database NAME, which may be file: URI."""
+    if name.startswith('file:'):
+        name = name[len('file:'):].split('?', 1)[0]
+    return name
+
+
+def file_id(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    file_id = None
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        apply_pragmas(
+            connection, self.settings_dict.get('PRAGMAS', DEFAULT_PRAGMAS))
+        if self.settings_dict.get('REOPEN_ON_REPLACE'):
+            self.file_id = file_id(self.database_path())
+        return connection
+
+    def database_path(self):
+        return database_path(self.settings_dict['NAME'])
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict.get('TRANSACTION_MODE', 'DEFERRED')
+        if mode not in TRANSACTION_MODES:
+            mode = 'DEFERRED'
+        self.cursor().execute(f'BEGIN {mode}')
+
+    def is_usable(self):
+        try:
+            self.connection.execute('SELECT 1')
+        except base.Database.Error:
+            return False
+        return True
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        if self.connection is None or self.in_atomic_block:
+            return
+        if (self.settings_dict.get('HEALTH_CHECKS')
+                and not self.is_usable()):
+            self.close()
+        elif (self.settings_dict.get('REOPEN_ON_REPLACE')
+                and file_id(self.database_path()) != self.file_id):
+            self.close()
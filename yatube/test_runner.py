@@ -0,0 +1,38 @@
+import contextlib
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner as BaseDiscoverRunner
+
+
+@contextlib.contextmanager
+def isolated_cache():
+    """Point default cache to a temporary directory while inside.
+
+    Tests clear and fill the cache, so they must not share it with the
+    development server or with earlier test runs.
+    """
+    directory = tempfile.mkdtemp(prefix='yatube-cache-')
+    caches = {
+        alias: dict(options, LOCATION=directory)
+        for alias, options in settings.CACHES.items()
+    }
+    try:
+        with override_settings(CACHES=caches):
+            yield directory
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class DiscoverRunner(BaseDiscoverRunner):
+    """Test runner giving every run a cache of its own."""
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache = isolated_cache()
+        self.cache.__enter__()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache.__exit__(None, None, None)
+        super().teardown_test_environment(**kwargs)
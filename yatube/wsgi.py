@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Compile templates at worker start, not on first requests.
+from posts.template_loaders import precompile_templates  # noqa: E402
+
+precompile_templates()